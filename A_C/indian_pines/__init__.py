@@ -0,0 +1,8 @@
+"""Indian Pines spatial CNN: dataset preparation, training, decoding and the
+multi-patch-size ensemble.
+
+Command line: python -m indian_pines {prepare,train,decode,ensemble} --help
+
+Importing the package is cheap; TensorFlow and scipy are only imported by
+the modules (and command line stages) that need them.
+"""
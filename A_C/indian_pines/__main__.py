@@ -0,0 +1,143 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import os
+import time
+
+from . import train
+
+# Command line of the Indian Pines pipeline, run from the folder holding Data/:
+#   python -m indian_pines prepare --patch-sizes 5 11 21 31 37
+#   python -m indian_pines train --patch-sizes 5 11 21 31 37 --workers 3
+#   python -m indian_pines convert --cube Data/Indian_pines.mat --output Data/Indian_pines.npy
+#   python -m indian_pines decode --patch-size 21 --cube Data/Indian_pines.npy --output Data/class_map_21.npy
+#   python -m indian_pines ensemble --output Data/class_map.npy
+# Every stage imports only what it uses; TensorFlow is loaded by train,
+# decode and ensemble when a model runs.
+
+
+def load_ground_truth(data_path):
+    import scipy.io
+    return scipy.io.loadmat(os.path.join(data_path, 'Indian_pines_gt.mat'))['indian_pines_gt']
+
+
+def parse_scores(scores):
+    # ['5x5=86.19', ...] -> {'5x5': 86.19, ...}
+    return dict((name, float(value)) for name, value in (score.split('=') for score in scores))
+
+
+def prepare(args):
+    from . import dataset_builder
+    input_mat, target_mat = train.scaled_scene(args.data_path)
+    formats = ('shards', 'mat') if args.export_mat else ('shards',)
+    for patch_size in args.patch_sizes:
+        start = time.time()
+        dataset_builder.prepare(input_mat, target_mat, patch_size, args.data_path, args.count, args.test_frac,
+                                seed=args.seed, formats=formats)
+        print('%dx%d: %.1f s' % (patch_size, patch_size, time.time() - start))
+
+
+def convert(args):
+    from . import tiled_inference
+    output = args.output or os.path.splitext(args.cube)[0] + '.npy'
+    start = time.time()
+    tiled_inference.convert_cube(args.cube, output, args.key)
+    print('Wrote %s in %.1f s' % (output, time.time() - start))
+
+
+def decode(args):
+    from . import ensemble
+    from . import scene_metrics
+    from . import tiled_inference
+    checkpoint = args.checkpoint or ensemble.checkpoint_path(args.model_path, args.patch_size)
+    if checkpoint is None:
+        raise SystemExit('No checkpoint for patch size ' + ensemble.key(args.patch_size) + ' in ' + args.model_path)
+    try:
+        cube = tiled_inference.open_cube(args.cube or os.path.join(args.data_path, 'Indian_pines.mat'))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    target = None if args.all_pixels else load_ground_truth(args.data_path)
+    start = time.time()
+    outputs = tiled_inference.classify_scene(cube, args.patch_size, checkpoint, args.output, args.tile_size,
+                                             args.batch_size, target)
+    print('Classified the scene in %.1f s, class map in %s' % (time.time() - start, args.output))
+    if target is not None:
+        print(scene_metrics.evaluate(target, outputs, 16).summary())
+
+
+def ensemble_stage(args):
+    import numpy as np
+    from . import ensemble
+    from . import scene_metrics
+    target = load_ground_truth(args.data_path)
+    if os.path.exists(args.predictions):
+        predictions = ensemble.load_predictions(args.predictions)
+    else:
+        input_image = train.scaled_scene(args.data_path)[0]
+        start = time.time()
+        predictions = ensemble.predict_all(input_image, target, args.patch_sizes, args.model_path, args.batch_size)
+        print('Ran %d models in %.1f s' % (len(predictions), time.time() - start))
+        ensemble.save_predictions(args.predictions, predictions)
+    scores = parse_scores(args.scores) if args.scores else ensemble.VALIDATION_SCORES
+    fused, valid = ensemble.fuse(predictions, ensemble.credibility(dict((k, scores[k]) for k in predictions)))
+    class_map = ensemble.class_map(fused, valid)
+    np.save(args.output, class_map.astype(np.uint8))
+    print(scene_metrics.evaluate(target, class_map, 16).summary())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m indian_pines", description="Indian Pines spatial CNN pipeline.")
+    stages = parser.add_subparsers(dest="stage")
+    stages.required = True
+    data_path = os.path.join(os.getcwd(), "Data")
+
+    p = stages.add_parser("prepare", help="write the training and test shards of patch sizes")
+    p.add_argument("--patch-sizes", nargs="+", type=int, default=train.PATCH_SIZES)
+    p.add_argument("--data-path", default=data_path)
+    p.add_argument("--count", type=int, default=200, help="training patches of every class")
+    p.add_argument("--test-frac", type=float, default=0.25)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--export-mat", action="store_true", help="also write the Train/Test .mat files")
+    p.set_defaults(run=prepare)
+
+    p = stages.add_parser("train", help="train the models of patch sizes in parallel")
+    train.add_arguments(p)
+    p.set_defaults(run=train.run)
+
+    p = stages.add_parser("convert", help="write a .mat cube to a .npy file that decode memory-maps")
+    p.add_argument("--cube", default=os.path.join(data_path, "Indian_pines.mat"))
+    p.add_argument("--key", default="indian_pines", help="name of the cube in the .mat file")
+    p.add_argument("--output", default=None, help=".npy file (default: the cube path with .npy)")
+    p.set_defaults(run=convert)
+
+    p = stages.add_parser("decode", help="classify the scene with the model of one patch size")
+    p.add_argument("--patch-size", type=int, required=True)
+    p.add_argument("--data-path", default=data_path)
+    p.add_argument("--model-path", default="./")
+    p.add_argument("--checkpoint", default=None, help="checkpoint to restore (default: newest of the patch size)")
+    p.add_argument("--cube", default=None, help=".npy (memory-mapped) or .mat cube (default: Data/Indian_pines.mat); "
+                   ".mat files older than v7.3 above 1 GB need convert first")
+    p.add_argument("--all-pixels", action="store_true", help="classify every pixel, not only the labelled ones")
+    p.add_argument("--tile-size", type=int, default=256)
+    p.add_argument("--batch-size", type=int, default=1024)
+    p.add_argument("--output", default="class_map.npy")
+    p.set_defaults(run=decode)
+
+    p = stages.add_parser("ensemble", help="fuse the models of all patch sizes with their credibility")
+    p.add_argument("--patch-sizes", nargs="+", type=int, default=train.PATCH_SIZES)
+    p.add_argument("--data-path", default=data_path)
+    p.add_argument("--model-path", default="./")
+    p.add_argument("--predictions", default="Predictions.npz", help="probabilities of the models, computed if missing")
+    p.add_argument("--scores", nargs="+", default=None, help="validation scores, e.g. 5x5=86.19 11x11=85.19")
+    p.add_argument("--batch-size", type=int, default=1024)
+    p.add_argument("--output", default="class_map.npy")
+    p.set_defaults(run=ensemble_stage)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+from . import dataset_builder
+from . import ensemble
+from . import patch_extractor
+from . import patch_shards
+from . import scene_metrics
+
+# Benchmarks of the pipeline stages on a synthetic scene of the size of
+# Indian Pines (no data files or checkpoints needed).
+# Usage: python -m indian_pines.benchmark <name> [args...]
+
+HEIGHT, WIDTH, BANDS, CLASSES = 145, 145, 220, 16
+
+
+def synthetic_scene(seed=0, labelled=0.5):
+    # scaled cube and a ground truth with about half of the pixels labelled
+    rng = np.random.RandomState(seed)
+    input_mat = rng.random_sample((HEIGHT, WIDTH, BANDS))
+    target_mat = rng.randint(1, CLASSES + 1, size=(HEIGHT, WIDTH)) * (rng.random_sample((HEIGHT, WIDTH)) < labelled)
+    return input_mat, target_mat.astype(np.uint8)
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+
+def notebook_patch(data, height_index, width_index, patch_size):
+    # Patch() of the decoder notebook before the PatchExtractor
+    transpose_array = data.transpose((2, 0, 1))
+    patch = transpose_array[:, height_index:height_index+patch_size, width_index:width_index+patch_size]
+    mean = np.array([np.mean(transpose_array[i, :, :]) for i in range(transpose_array.shape[0])])
+    mean_patch = np.asarray([patch[i] - mean[i] for i in range(patch.shape[0])])
+    return mean_patch.transpose((1, 2, 0)).reshape(1, -1)
+
+
+def bench_startup():
+    # Time to reach the command line parser, and the heavy modules it imported
+    code = ("import sys, time; start = time.time(); import indian_pines.__main__; "
+            "print('%.3f' % (time.time() - start), "
+            "[m for m in ['tensorflow', 'scipy', 'numpy', 'spectral', 'pandas', 'skimage'] if m in sys.modules])")
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print("import of the command line: " + subprocess.check_output([sys.executable, "-c", code], cwd=cwd).decode().strip())
+
+
+def bench_patches(num_patches=200, patch_size=21):
+    input_mat, target_mat = synthetic_scene()
+    rng = np.random.RandomState(1)
+    rows = rng.randint(HEIGHT - patch_size + 1, size=num_patches)
+    cols = rng.randint(WIDTH - patch_size + 1, size=num_patches)
+
+    # band means of the notebooks, one np.mean per band
+    notebook_mean = np.array([np.mean(input_mat[:, :, i]) for i in range(BANDS)])
+    assert np.allclose(patch_extractor.band_means(input_mat), notebook_mean, rtol=1e-12, atol=0)
+
+    start = time.time()
+    old = np.concatenate([notebook_patch(input_mat, i, j, patch_size) for i, j in zip(rows, cols)])
+    old_time = time.time() - start
+    start = time.time()
+    patches = patch_extractor.PatchExtractor(input_mat, patch_size)
+    new = patches.batch(rows, cols).reshape(num_patches, -1)
+    new_time = time.time() - start
+    print("%d patches %dx%d - per patch: %.3fs\tPatchExtractor: %.3fs (%.0fx)\tsame values: %s"
+          % (num_patches, patch_size, patch_size, old_time, new_time, old_time / new_time, np.allclose(old, new)))
+
+
+def bench_prepare(*patch_sizes):
+    input_mat, target_mat = synthetic_scene()
+    folder = tempfile.mkdtemp()
+    try:
+        for patch_size in patch_sizes or [5, 11, 21, 31, 37]:
+            start = time.time()
+            dataset_builder.prepare(input_mat, target_mat, patch_size, folder)
+            print("%dx%d shards: %.2fs" % (patch_size, patch_size, time.time() - start))
+    finally:
+        shutil.rmtree(folder)
+
+
+def check_splits(patch_size=3, count=20, test_frac=0.25):
+    # Class buckets, split sizes and oversample counts on a tiny map against the notebook loops
+    rng = np.random.RandomState(3)
+    target_mat = rng.choice(5, size=(14, 14), p=[0.3, 0.4, 0.2, 0.08, 0.02])
+    target_mat[patch_size // 2, patch_size // 2] = 4  # at least one patch of every class
+    labels = dataset_builder.centre_labels(target_mat, patch_size)
+    c = (patch_size - 1) // 2
+    notebook_classes = [[] for _ in range(4)]
+    for i in range(target_mat.shape[0] - patch_size + 1):
+        for j in range(target_mat.shape[1] - patch_size + 1):
+            if target_mat[i + c, j + c] != 0:
+                notebook_classes[target_mat[i + c, j + c] - 1].append(i * labels.shape[1] + j)
+    classes = dataset_builder.class_indices(labels, 4)
+    assert [list(index) for index in classes] == notebook_classes
+
+    train_classes, test_index, test_labels = dataset_builder.test_split(classes, test_frac, rng)
+    for l, (index, train) in enumerate(zip(classes, train_classes)):
+        test = test_index[test_labels == l]
+        assert len(test) == int(len(index) * test_frac) and len(train) + len(test) == len(index)
+        assert sorted(np.concatenate([train, test])) == sorted(index)
+
+    train_index, train_labels = dataset_builder.oversample(train_classes, count, rng)
+    assert len(train_index) == len(train_labels) == 4 * count
+    for l, train in enumerate(train_classes):
+        drawn = train_index[train_labels == l]
+        assert len(drawn) == count and set(drawn) <= set(train)
+        if len(train) >= count:
+            assert len(set(drawn)) == count
+    print("class buckets, split sizes and oversample counts: ok (training patches per class: %s)"
+          % [len(train) for train in train_classes])
+
+
+def bench_shards(patch_size=21, num_steps=200, batch_size=100):
+    input_mat, target_mat = synthetic_scene()
+    folder = tempfile.mkdtemp()
+    try:
+        dataset_builder.prepare(input_mat, target_mat, patch_size, folder)
+        shard_folder = patch_shards.shard_folder(folder, patch_size)
+        rss = peak_rss_mb()
+        start = time.time()
+        data_set = patch_shards.ShardedDataSet(shard_folder, 'train', seed=0)
+        for step in range(num_steps):
+            data_set.next_batch(batch_size)
+        print("memory-mapped: %.1f batches/sec, peak RSS +%.0f MB"
+              % (num_steps / (time.time() - start), peak_rss_mb() - rss))
+        start = time.time()
+        images, labels = patch_shards.load_split(shard_folder, 'train')
+        print("load_split: %d patches in %.2fs, peak RSS +%.0f MB"
+              % (len(images), time.time() - start, peak_rss_mb() - rss))
+    finally:
+        shutil.rmtree(folder)
+
+
+def bench_decode(patch_size=11, num_patches=2000, batch_size=1024):
+    # Per-pixel sess.run against batches, with an untrained model
+    import tensorflow as tf
+    from . import model
+    input_mat, target_mat = synthetic_scene()
+    corners, centres = ensemble.labelled_centres(target_mat, patch_size)
+    corners = corners[:num_patches]
+    patches = patch_extractor.PatchExtractor(input_mat, patch_size)
+    model.set_patch_size(patch_size)
+    with tf.Graph().as_default():
+        images_placeholder = tf.placeholder(tf.float32, shape=(None, model.IMAGE_PIXELS))
+        sm = tf.nn.softmax(model.inference(images_placeholder, *ensemble.LAYERS))
+        with tf.Session() as sess:
+            sess.run(tf.global_variables_initializer())
+            start = time.time()
+            for i, j in corners:
+                sess.run(sm, {images_placeholder: patches.batch([i], [j]).reshape(1, -1)})
+            loop_time = time.time() - start
+            start = time.time()
+            for batch in np.array_split(corners, max(1, len(corners) // batch_size)):
+                sess.run(sm, {images_placeholder: patches.batch(batch[:, 0], batch[:, 1]).reshape(len(batch), -1)})
+            batch_time = time.time() - start
+    print("%d patches - per pixel: %.2fs\tbatched: %.2fs (%.1fx)" % (len(corners), loop_time, batch_time,
+                                                                      loop_time / batch_time))
+
+
+def bench_ensemble(repeats=10):
+    input_mat, target_mat = synthetic_scene()
+    rng = np.random.RandomState(2)
+    predictions = {}
+    for k in ensemble.VALIDATION_SCORES:
+        probs = rng.random_sample((HEIGHT, WIDTH, CLASSES)).astype(np.float32)
+        mask = target_mat != 0
+        predictions[k] = ensemble.ScenePredictions(probs * mask[:, :, None], mask)
+    credibility = ensemble.credibility(ensemble.VALIDATION_SCORES)
+    start = time.time()
+    for _ in range(repeats):
+        fused, valid = ensemble.fuse(predictions, credibility)
+        confusion = scene_metrics.evaluate(target_mat, ensemble.class_map(fused, valid), CLASSES)
+    print("fusion and evaluation of %d models: %.1f ms\toverall accuracy: %.4f"
+          % (len(predictions), 1000 * (time.time() - start) / repeats, confusion.overall_accuracy()))
+
+
+def check_fuse():
+    # fuse() and class_map() on a tiny map against the summed maps and argmax loop of credibility.ipynb
+    rng = np.random.RandomState(4)
+    predictions = {}
+    for k in ['5x5', '11x11']:
+        mask = rng.random_sample((3, 4)) < 0.6
+        predictions[k] = ensemble.ScenePredictions(rng.random_sample((3, 4, CLASSES)).astype(np.float32)
+                                                   * mask[:, :, None], mask)
+    credibility = ensemble.credibility({'5x5': 86.19, '11x11': 85.19})
+    fused, valid = ensemble.fuse(predictions, credibility)
+    final_matrix = sum(np.float32(credibility[k]) * predictions[k].probs for k in predictions)
+    assert np.array_equal(fused, final_matrix)
+    assert np.array_equal(valid, predictions['5x5'].mask | predictions['11x11'].mask)
+    notebook_map = [[np.argmax(final_matrix[i][j]) + 1 if np.count_nonzero(final_matrix[i][j]) else 0
+                     for j in range(4)] for i in range(3)]
+    assert np.array_equal(ensemble.class_map(fused, valid), notebook_map)
+    try:
+        ensemble.fuse({}, credibility)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('fuse({}) did not raise ValueError')
+    print("fuse and class_map: ok")
+
+
+def check_confusion(num_classes=4):
+    # ConfusionMatrix on a tiny map against the per-pixel loops of credibility.ipynb
+    rng = np.random.RandomState(5)
+    output_image = rng.randint(num_classes + 1, size=(6, 7))
+    output_image.ravel()[:num_classes] = np.arange(1, num_classes + 1)  # every class is present
+    predictions = rng.randint(1, num_classes + 1, size=output_image.shape) * (output_image != 0)
+    predictions[0, :2] = 0  # unclassified pixels
+    targets = [output_image[j][i] for j in range(6) for i in range(7) if output_image[j][i] != 0]
+    count_mat = np.bincount(np.unique(targets, return_inverse=True)[1])
+    cnf_mat = [[0 for x in range(num_classes)] for y in range(num_classes)]
+    for i in range(6):
+        for j in range(7):
+            if predictions[i][j] != 0:
+                cnf_mat[predictions[i][j] - 1][output_image[i][j] - 1] += 1
+
+    confusion = scene_metrics.evaluate(output_image, predictions, num_classes)
+    assert np.array_equal(confusion.population, count_mat)
+    assert np.array_equal(confusion.matrix, cnf_mat)
+    assert np.allclose(confusion.percent(), 100 * np.array(cnf_mat, dtype=float) / count_mat)
+    assert np.isclose(confusion.overall_accuracy(), np.trace(cnf_mat) / float(len(targets)))
+    tiled = scene_metrics.evaluate(output_image, predictions, num_classes, tile_rows=4)
+    assert np.array_equal(tiled.matrix, confusion.matrix) and np.array_equal(tiled.population, confusion.population)
+    print("confusion matrix: ok (%s)" % confusion.summary())
+
+
+benchmarks = {"startup": bench_startup,
+              "patches": bench_patches,
+              "prepare": bench_prepare,
+              "check_splits": check_splits,
+              "shards": bench_shards,
+              "decode": bench_decode,
+              "ensemble": bench_ensemble,
+              "check_fuse": check_fuse,
+              "check_confusion": check_confusion}
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else "startup"
+    benchmarks[name](*[int(arg) for arg in sys.argv[2:]])
@@ -0,0 +1,54 @@
+"""In-memory patches and labels, batched for training (the Spatial_dataset
+module the notebooks import as input_data)."""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+class DataSet(object):
+    """Patches and labels with an epoch-shuffled next_batch().
+
+    images are given as saved by the dataset preparation, (n, bands,
+    patch_size, patch_size), and kept flattened in the (patch_size,
+    patch_size, bands) order of the network input.
+    """
+
+    def __init__(self, images, labels, seed=None):
+        images = np.asarray(images)
+        self.images = images.transpose((0, 2, 3, 1)).reshape(images.shape[0], -1).astype(np.float32)
+        self.labels = np.asarray(labels).ravel().astype(np.int32)
+        self.num_examples = images.shape[0]
+        self.rng = np.random.RandomState(seed)
+        self.epochs_completed = 0
+        self.index_in_epoch = 0
+
+    def next_batch(self, batch_size):
+        """Return the next `batch_size` examples from this data set."""
+        start = self.index_in_epoch
+        self.index_in_epoch += batch_size
+        if self.index_in_epoch > self.num_examples:
+            # Finished epoch, shuffle the data and start the next epoch
+            self.epochs_completed += 1
+            perm = self.rng.permutation(self.num_examples)
+            self.images = self.images[perm]
+            self.labels = self.labels[perm]
+            start = 0
+            self.index_in_epoch = batch_size
+            assert batch_size <= self.num_examples
+        end = self.index_in_epoch
+        return self.images[start:end], self.labels[start:end]
+
+
+def read_data_sets(filename, split):
+    """Reads the patches of one Train_<P>_<k>.mat or Test_<P>_<k>.mat file.
+    Args:
+    filename: Path of the .mat file.
+    split: 'train' or 'test', the prefix of the keys in the file.
+    Returns:
+    data_set: DataSet of the file.
+    """
+    import scipy.io
+    mat = scipy.io.loadmat(filename)
+    return DataSet(mat[split + '_patch'], mat[split + '_labels'])
@@ -0,0 +1,163 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import numpy as np
+import scipy.io
+
+from . import patch_extractor
+from . import patch_shards
+
+# Training and test splits of the Indian Pines patches, kept as index arrays
+# into the grid of patch corners. Patches are only extracted when the
+# splits are written.
+
+
+def centre_labels(target_mat, patch_size):
+    """Label of the centre pixel of every patch.
+    Args:
+    target_mat: The (height, width) ground truth, 0 for unknown land cover.
+    patch_size: Side of the patches.
+    Returns:
+    labels: Array of shape (height-patch_size+1, width-patch_size+1); labels[i, j] belongs to the
+      patch whose top left corner is at (i, j).
+    """
+    height, width = target_mat.shape
+    c = int((patch_size - 1) / 2)
+    return target_mat[c:c + height - patch_size + 1, c:c + width - patch_size + 1]
+
+
+def class_indices(labels, num_classes):
+    """Flat indices of the patches of every class, in row-major order.
+    Args:
+    labels: Centre labels, from centre_labels().
+    num_classes: Number of classes; label l is class l-1, label 0 is ignored.
+    Returns:
+    classes: List of num_classes index arrays into labels.ravel().
+    """
+    flat = labels.ravel()
+    order = np.argsort(flat, kind='mergesort')  # stable, keeps row-major order within a class
+    counts = np.bincount(flat, minlength=num_classes + 1)
+    bounds = np.cumsum(counts)
+    return [order[bounds[l - 1]:bounds[l]] for l in range(1, num_classes + 1)]
+
+
+def test_split(classes, test_frac, rng):
+    """Moves a random test_frac of every class to the test set.
+    Args:
+    classes: Index arrays of the classes, from class_indices().
+    test_frac: Fraction of every class used for testing.
+    rng: np.random.RandomState used for shuffling.
+    Returns:
+    train_classes: List with the remaining index array of every class.
+    test_index: Indices of the test patches, class by class.
+    test_labels: Class (0 to num_classes-1) of every test patch.
+    """
+    train_classes, test_index, test_labels = [], [], []
+    for c, index in enumerate(classes):
+        index = rng.permutation(index)
+        test_split_size = int(len(index) * test_frac)
+        train_classes.append(index[:len(index) - test_split_size])
+        test_index.append(index[len(index) - test_split_size:])
+        test_labels.append(np.full(test_split_size, c, dtype=int))
+    return train_classes, np.concatenate(test_index), np.concatenate(test_labels)
+
+
+def oversample(train_classes, count, rng):
+    """Draws count training patches of every class, repeating the patches of small classes.
+    Args:
+    train_classes: Index arrays of the training patches of every class.
+    count: Number of patches of every class.
+    rng: np.random.RandomState used for shuffling.
+    Returns:
+    train_index: Indices of the num_classes*count training patches, class by class.
+    train_labels: Class of every training patch (float, as the notebook used to save them).
+    """
+    train_index = []
+    for index in train_classes:
+        if len(index) < count:
+            index = np.tile(index, count // len(index) + 1)
+        train_index.append(rng.permutation(index)[:count])
+    train_labels = np.repeat(np.arange(len(train_classes), dtype=float), count)
+    return np.concatenate(train_index), train_labels
+
+
+def save_mat(patches, index, labels, prefix, data_path, per_file):
+    """Writes <Prefix>_<patch_size>_<k>.mat files of per_file patches each.
+    A remainder of fewer than per_file patches is not written, as before.
+    Args:
+    patches: PatchExtractor of the scaled image.
+    index: Flat indices of the patches to write.
+    labels: Labels of these patches.
+    prefix: 'train' or 'test'; also the prefix of the keys in the files.
+    data_path: Folder of the files.
+    per_file: Number of patches per file.
+    Returns:
+    file_names: Names of the written files.
+    """
+    rows, cols = np.unravel_index(index, patches.shape)
+    file_names = []
+    for i in range(len(index) // per_file):
+        start = i * per_file
+        end = (i + 1) * per_file
+        file_name = prefix.capitalize() + '_' + str(patches.patch_size) + '_' + str(i + 1) + '.mat'
+        scipy.io.savemat(os.path.join(data_path, file_name),
+                         {prefix + "_patch": patches.batch(rows[start:end], cols[start:end], channels_first=True),
+                          prefix + "_labels": labels[start:end]})
+        file_names.append(file_name)
+    return file_names
+
+
+def save_shards(patches, index, labels, split, data_path, per_shard):
+    """Writes the patches of one split to the memory-mapped shards of patch_shards.
+    Args:
+    patches: PatchExtractor of the scaled image.
+    index: Flat indices of the patches to write.
+    labels: Labels of these patches.
+    split: 'train' or 'test'.
+    data_path: Folder of the shard folders.
+    per_shard: Number of patches per shard; the last shard holds the remainder.
+    Returns:
+    folder: The shard folder of the patch size.
+    """
+    folder = patch_shards.shard_folder(data_path, patches.patch_size)
+    writer = patch_shards.ShardWriter(folder, split)
+    rows, cols = np.unravel_index(index, patches.shape)
+    for start in range(0, len(index), per_shard):
+        end = start + per_shard
+        writer.add(patches.batch(rows[start:end], cols[start:end]), labels[start:end])
+    writer.close()
+    return folder
+
+
+def prepare(input_mat, target_mat, patch_size, data_path, count=200, test_frac=0.25, num_classes=16, seed=0,
+            formats=('shards',)):
+    """Splits the patches of one patch size and writes them.
+    Args:
+    input_mat: The scaled (height, width, bands) image.
+    target_mat: The (height, width) ground truth.
+    patch_size: Side of the patches.
+    data_path: Folder of the output files.
+    count: Number of training patches of every class.
+    test_frac: Fraction of every class used for testing.
+    num_classes: Number of classes.
+    seed: Seed of the shuffles.
+    formats: 'shards' for the memory-mapped shards, 'mat' for the Train/Test .mat files.
+    Returns:
+    outputs: Dictionary from format to the shard folder ('shards') or the pair of
+      lists of training and test file names ('mat').
+    """
+    rng = np.random.RandomState(seed)
+    patches = patch_extractor.PatchExtractor(input_mat, patch_size)
+    classes = class_indices(centre_labels(target_mat, patch_size), num_classes)
+    train_classes, test_index, test_labels = test_split(classes, test_frac, rng)
+    train_index, train_labels = oversample(train_classes, count, rng)
+    outputs = {}
+    if 'shards' in formats:
+        save_shards(patches, train_index, train_labels, 'train', data_path, count * 2)
+        outputs['shards'] = save_shards(patches, test_index, test_labels, 'test', data_path, count * 2)
+    if 'mat' in formats:
+        outputs['mat'] = (save_mat(patches, train_index, train_labels, 'train', data_path, count * 2),
+                          save_mat(patches, test_index, test_labels, 'test', data_path, count * 2))
+    return outputs
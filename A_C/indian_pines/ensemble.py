@@ -0,0 +1,162 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import glob
+import os
+import re
+import numpy as np
+
+from . import dataset_builder
+from . import patch_extractor
+
+# Ensemble of the IndianPinesCNN models trained for several patch sizes.
+# Every model classifies the labelled pixels of the scene into a dense
+# float32 probability map with a validity mask; the maps are fused with the
+# credibility (normalized validation score) of each model. TensorFlow is
+# only imported to run the models, not to fuse saved predictions.
+
+# conv1, conv2, fc1 and fc2 of the decoder
+LAYERS = (500, 100, 200, 84)
+
+# validation scores of the models in credibility.ipynb
+VALIDATION_SCORES = {'5x5': 86.19, '11x11': 85.19, '21x21': 97.31, '31x31': 98.19, '37x37': 99.56}
+
+
+class ScenePredictions(object):
+    """Class probabilities of one model for every pixel of the scene.
+    probs: float32 array (height, width, NUM_CLASSES), zero where mask is False.
+    mask: bool array (height, width), True for the pixels the model classified.
+    """
+
+    def __init__(self, probs, mask):
+        self.probs = probs
+        self.mask = mask
+
+
+def key(patch_size):
+    # '5x5', ... as in validation_scores
+    return str(patch_size) + 'x' + str(patch_size)
+
+
+def checkpoint_path(model_path, patch_size):
+    """Newest ./model-spatial-CNN-<P>X<P>.ckpt-<step> checkpoint written by CNN_feed.
+    Args:
+    model_path: Folder of the checkpoints.
+    patch_size: Patch size of the model.
+    Returns:
+    path: Checkpoint prefix to restore, None if there is none.
+    """
+    prefix = os.path.join(model_path, 'model-spatial-CNN-' + str(patch_size) + 'X' + str(patch_size) + '.ckpt')
+    steps = []
+    for filename in glob.glob(prefix + '-*.index'):
+        match = re.match(re.escape(prefix) + r'-(\d+)\.index$', filename)
+        if match:
+            steps.append(int(match.group(1)))
+    return prefix + '-' + str(max(steps)) if steps else None
+
+
+def labelled_centres(target_mat, patch_size):
+    """Top left corners and centres of the patches centred on labelled pixels.
+    Returns:
+    corners: (n, 2) array of the top left corners, in row-major order.
+    centres: (n, 2) array of the centre pixels.
+    """
+    corners = np.argwhere(dataset_builder.centre_labels(target_mat, patch_size) != 0)
+    return corners, corners + int((patch_size - 1) / 2)
+
+
+def predict_scene(input_image, target_mat, patch_size, checkpoint, batch_size=1024, layers=LAYERS):
+    """Classifies every labelled pixel of the scene with one model.
+    Args:
+    input_image: The scaled (height, width, bands) image.
+    target_mat: The (height, width) ground truth; only its labelled pixels are classified.
+    patch_size: Patch size of the model.
+    checkpoint: Checkpoint of the model, from checkpoint_path().
+    batch_size: Number of patches per sess.run.
+    layers: conv1, conv2, fc1 and fc2 of the model.
+    Returns:
+    predictions: ScenePredictions of the model.
+    """
+    import tensorflow as tf
+    from . import model
+    patches = patch_extractor.PatchExtractor(input_image, patch_size)
+    corners, centres = labelled_centres(target_mat, patch_size)
+    probs = np.zeros(target_mat.shape + (model.NUM_CLASSES,), dtype=np.float32)
+    mask = np.zeros(target_mat.shape, dtype=bool)
+
+    model.set_patch_size(patch_size)
+    with tf.Graph().as_default():
+        images_placeholder = tf.placeholder(tf.float32, shape=(None, model.IMAGE_PIXELS))
+        sm = tf.nn.softmax(model.inference(images_placeholder, *layers))
+        saver = tf.train.Saver()
+        with tf.Session() as sess:
+            saver.restore(sess, checkpoint)
+            for start in range(0, len(corners), batch_size):
+                batch = corners[start:start+batch_size]
+                rows, cols = centres[start:start+batch_size].T
+                image_patches = patches.batch(batch[:, 0], batch[:, 1]).reshape(len(batch), -1)
+                probs[rows, cols] = sess.run(sm, feed_dict={images_placeholder: image_patches})
+                mask[rows, cols] = True
+    return ScenePredictions(probs, mask)
+
+
+def predict_all(input_image, target_mat, patch_sizes, model_path='./', batch_size=1024, layers=LAYERS):
+    """Runs the model of every patch size over the scene.
+    Returns:
+    predictions: Dictionary from key(patch_size) to ScenePredictions.
+    """
+    predictions = {}
+    for patch_size in patch_sizes:
+        checkpoint = checkpoint_path(model_path, patch_size)
+        if checkpoint is None:
+            raise IOError('No checkpoint for patch size ' + key(patch_size) + ' in ' + model_path)
+        predictions[key(patch_size)] = predict_scene(input_image, target_mat, patch_size, checkpoint,
+                                                     batch_size, layers)
+    return predictions
+
+
+def credibility(validation_scores):
+    # validation score of each model over the sum of all scores
+    total = sum(validation_scores.values())
+    return dict((k, value / total) for k, value in validation_scores.items())
+
+
+def fuse(predictions, credibility):
+    """Credibility-weighted sum of the probability maps.
+    Args:
+    predictions: Dictionary from key to ScenePredictions.
+    credibility: Dictionary from key to the weight of the model.
+    Returns:
+    fused: float32 array (height, width, NUM_CLASSES).
+    valid: bool array (height, width), True where at least one model classified the pixel.
+    """
+    if not predictions:
+        raise ValueError('No predictions to fuse')
+    fused, valid = None, None
+    for k, prediction in predictions.items():
+        if fused is None:
+            fused = np.zeros_like(prediction.probs)
+            valid = np.zeros_like(prediction.mask)
+        fused += np.float32(credibility[k]) * prediction.probs
+        valid |= prediction.mask
+    return fused, valid
+
+
+def class_map(fused, valid):
+    # Classes 1-16 of the fused maps, 0 where no model classified the pixel
+    return np.where(valid, np.argmax(fused, axis=-1) + 1, 0)
+
+
+def save_predictions(filename, predictions):
+    arrays = {}
+    for k, prediction in predictions.items():
+        arrays['probs_' + k] = prediction.probs
+        arrays['mask_' + k] = prediction.mask
+    np.savez(filename, **arrays)
+
+
+def load_predictions(filename):
+    with np.load(filename) as arrays:
+        return dict((name[len('probs_'):], ScenePredictions(arrays[name], arrays['mask_' + name[len('probs_'):]]))
+                    for name in arrays.files if name.startswith('probs_'))
@@ -0,0 +1,73 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+def band_means(data):
+    """Mean of every band of a (height, width, bands) cube.
+    Args:
+    data: The hyperspectral cube.
+    Returns:
+    mean: Array of shape (bands,), the same values as the mean_array()/MEAN_ARRAY of the notebooks.
+    """
+    return np.asarray(data).mean(axis=(0, 1))
+
+
+def sliding_windows(data, patch_size):
+    """All patch_size x patch_size windows of a cube, without copying it.
+    Args:
+    data: The (height, width, bands) cube.
+    patch_size: Side of the windows.
+    Returns:
+    windows: Read-only view of shape (height-patch_size+1, width-patch_size+1, patch_size, patch_size, bands);
+      windows[i, j] is the patch whose top left corner is at (i, j).
+    """
+    height, width, bands = data.shape
+    s0, s1, s2 = data.strides
+    return as_strided(data, shape=(height - patch_size + 1, width - patch_size + 1, patch_size, patch_size, bands),
+                      strides=(s0, s1, s0, s1, s2), writeable=False)
+
+
+class PatchExtractor(object):
+    """Mean-normalized patches of a hyperspectral cube.
+
+    The band means are computed once (or given, e.g. the means of the whole
+    scene when data is one tile of it) and the windows are a strided view of
+    the cube, so a patch is only copied when a batch is asked for.
+    """
+
+    def __init__(self, data, patch_size, mean=None):
+        self.data = data
+        self.patch_size = patch_size
+        self.mean = band_means(data) if mean is None else mean
+        self.windows = sliding_windows(data, patch_size)
+
+    @property
+    def shape(self):
+        # number of top left corners along the height and the width
+        return self.windows.shape[:2]
+
+    def batch(self, height_indices, width_indices, channels_first=False, out=None):
+        """Mean-normalized patches with the given top left corners.
+        Args:
+        height_indices: Row indices of the top left corners.
+        width_indices: Column indices of the top left corners.
+        channels_first: Patches of shape (bands, patch_size, patch_size), as saved by the dataset
+          preparation, instead of (patch_size, patch_size, bands), as fed to the network.
+        out: Optional array of the result shape to write the patches into.
+        Returns:
+        patches: Array of shape (n, patch_size, patch_size, bands) or (n, bands, patch_size, patch_size).
+        """
+        windows = self.windows[np.asarray(height_indices), np.asarray(width_indices)]
+        if channels_first:
+            return np.subtract(windows.transpose((0, 3, 1, 2)), self.mean[:, None, None], out=out)
+        return np.subtract(windows, self.mean, out=out)
+
+    def batches(self, height_indices, width_indices, batch_size, channels_first=False):
+        # Yields the patches of the given corners batch_size at a time
+        for start in range(0, len(height_indices), batch_size):
+            yield self.batch(height_indices[start:start+batch_size], width_indices[start:start+batch_size],
+                             channels_first)
@@ -0,0 +1,196 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import numpy as np
+import scipy.io
+from concurrent.futures import ThreadPoolExecutor
+
+# Shard format of the prepared patches: a folder per patch size
+# (Data/shards_<patch_size>) holding, for each split ('train', 'test'),
+# <split>_<k>.npy with float32 patches of shape (n, patch_size, patch_size,
+# bands) -- the order the network reads them in -- <split>_<k>_labels.npy
+# with int32 classes, and the index <split>.json listing the shards and
+# their sizes. Shards are memory-mapped, so only the patches of a batch are
+# read from disk. concatenate_shards() loads whole splits into memory
+# instead, from these shards or from the Train/Test .mat files.
+
+
+def shard_folder(data_path, patch_size):
+    return os.path.join(data_path, 'shards_' + str(patch_size))
+
+
+class ShardWriter(object):
+    """Writes the patches of one split shard by shard, then the index."""
+
+    def __init__(self, folder, split):
+        self.folder = folder
+        self.split = split
+        self.shards = []
+        self.patch_shape = None
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+    def add(self, patches, labels):
+        """Writes one shard.
+        Args:
+        patches: Array of shape (n, patch_size, patch_size, bands).
+        labels: Array of the n classes (0 to num_classes-1).
+        """
+        name = self.split + '_' + str(len(self.shards) + 1)
+        np.save(os.path.join(self.folder, name + '.npy'), np.asarray(patches, dtype=np.float32))
+        np.save(os.path.join(self.folder, name + '_labels.npy'), np.asarray(labels, dtype=np.int32))
+        self.patch_shape = list(patches.shape[1:])
+        self.shards.append({"images": name + '.npy', "labels": name + '_labels.npy', "count": len(patches)})
+
+    def close(self):
+        # The index is written last, so a folder with an index has all its shards
+        index = {"patch_shape": self.patch_shape, "dtype": "float32", "shards": self.shards}
+        filename = os.path.join(self.folder, self.split + '.json')
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(index, f, indent=1)
+        os.replace(filename + '.tmp', filename)
+
+
+def read_index(folder, split):
+    with open(os.path.join(folder, split + '.json')) as f:
+        return json.load(f)
+
+
+def exists(folder, split):
+    return os.path.exists(os.path.join(folder, split + '.json'))
+
+
+class ShardedDataSet(object):
+    """Memory-mapped patches of one split, batched like input_data.DataSet.
+
+    next_batch() returns flattened float32 patches (batch_size, IMAGE_PIXELS)
+    and int32 labels, in the order of dataset.DataSet: the first epoch in
+    shard order (shuffled too if shuffle_first), then a new permutation
+    every epoch, the examples left at the end of an epoch being skipped.
+    """
+
+    def __init__(self, folder, split, seed=None, shuffle_first=False):
+        index = read_index(folder, split)
+        self.patch_shape = tuple(index["patch_shape"])
+        self.images = [np.load(os.path.join(folder, shard["images"]), mmap_mode='r') for shard in index["shards"]]
+        self.labels = np.concatenate([np.load(os.path.join(folder, shard["labels"])) for shard in index["shards"]])
+        self.offsets = np.cumsum([0] + [shard["count"] for shard in index["shards"]])
+        self.num_examples = int(self.offsets[-1])
+        self.rng = np.random.RandomState(seed)
+        self.order = self.rng.permutation(self.num_examples) if shuffle_first else np.arange(self.num_examples)
+        self.index_in_epoch = 0
+        self.epochs_completed = 0
+
+    def take(self, indices):
+        """Reads the patches with the given indices from their shards.
+        Args:
+        indices: Indices into the whole split.
+        Returns:
+        images: float32 array of shape (len(indices), IMAGE_PIXELS).
+        labels: int32 array of the len(indices) classes.
+        """
+        indices = np.asarray(indices)
+        images = np.empty((len(indices),) + self.patch_shape, dtype=np.float32)
+        shard = np.searchsorted(self.offsets, indices, side='right') - 1
+        for s in np.unique(shard):
+            selected = np.nonzero(shard == s)[0]
+            images[selected] = self.images[s][indices[selected] - self.offsets[s]]
+        return images.reshape(len(indices), -1), self.labels[indices]
+
+    def next_batch(self, batch_size):
+        start = self.index_in_epoch
+        self.index_in_epoch += batch_size
+        if self.index_in_epoch > self.num_examples:
+            # Finished epoch, shuffle the order as DataSet shuffles its arrays
+            self.epochs_completed += 1
+            self.order = self.order[self.rng.permutation(self.num_examples)]
+            start = 0
+            self.index_in_epoch = batch_size
+            assert batch_size <= self.num_examples
+        return self.take(self.order[start:self.index_in_epoch])
+
+
+# MATLAB classes reported by scipy.io.whosmat
+mat_dtypes = {'double': np.float64, 'single': np.float32, 'int64': np.int64, 'int32': np.int32,
+              'int16': np.int16, 'int8': np.int8, 'uint64': np.uint64, 'uint32': np.uint32,
+              'uint16': np.uint16, 'uint8': np.uint8}
+
+
+def as_rows(shape):
+    # savemat writes 1-D arrays as (1, n) rows
+    return (shape[1],) if len(shape) == 2 and shape[0] == 1 else tuple(shape)
+
+
+def shard_info(path, key):
+    """Shape and dtype of an array in a shard, read from the file header only.
+    Args:
+    path: A .npy shard or a .mat file.
+    key: Name of the array in a .mat file (ignored for .npy).
+    Returns:
+    shape: Shape of the array, (n,) for the label rows of .mat files.
+    dtype: Its NumPy dtype.
+    """
+    if path.endswith('.npy'):
+        array = np.load(path, mmap_mode='r')
+        return array.shape, array.dtype
+    for name, shape, mat_class in scipy.io.whosmat(path):
+        if name == key:
+            return as_rows(shape), np.dtype(mat_dtypes[mat_class])
+    raise KeyError(key + ' not in ' + path)
+
+
+def load_shard(path, key):
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    array = scipy.io.loadmat(path, variable_names=[key])[key]
+    return array.reshape(as_rows(array.shape))
+
+
+def concatenate_shards(paths, key, threads=4):
+    """Loads an array from every shard into one preallocated array.
+    The final array is allocated from the shard headers, then every shard
+    is loaded by one of the threads, copied into its slice and released,
+    so each shard is copied once.
+    Args:
+    paths: .npy shards or .mat files, in order.
+    key: Name of the array in the .mat files, e.g. 'train_patch' or 'train_labels'.
+    threads: Number of shards loaded at the same time.
+    Returns:
+    array: The arrays of all shards, concatenated along the first axis.
+    Raises:
+    ValueError: If paths is empty.
+    """
+    if not paths:
+        raise ValueError('no shards for key ' + str(key))
+    infos = [shard_info(path, key) for path in paths]
+    offsets = np.cumsum([0] + [shape[0] for shape, dtype in infos])
+    array = np.empty((offsets[-1],) + infos[0][0][1:], dtype=infos[0][1])
+
+    def fill(i):
+        array[offsets[i]:offsets[i+1]] = load_shard(paths[i], key)
+
+    pool = ThreadPoolExecutor(max(1, threads))
+    try:
+        # list() raises the first error of the loads
+        list(pool.map(fill, range(len(paths))))
+    finally:
+        pool.shutdown()
+    return array
+
+
+def load_split(folder, split, threads=4):
+    """Loads all shards of a split into memory.
+    Args:
+    folder: The shard folder of the patch size.
+    split: 'train' or 'test'.
+    threads: Number of shards loaded at the same time.
+    Returns:
+    images: float32 array of shape (n, patch_size, patch_size, bands).
+    labels: int32 array of the n classes.
+    """
+    shards = read_index(folder, split)["shards"]
+    return (concatenate_shards([os.path.join(folder, shard["images"]) for shard in shards], None, threads),
+            concatenate_shards([os.path.join(folder, shard["labels"]) for shard in shards], None, threads))
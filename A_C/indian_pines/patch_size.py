@@ -0,0 +1,6 @@
+import os
+
+# Side of the square patches the model is built for. The notebooks train and
+# decode one patch size at a time; PATCH_SIZE in the environment selects it,
+# e.g. PATCH_SIZE=21 jupyter notebook
+patch_size = int(os.environ.get('PATCH_SIZE', 11))
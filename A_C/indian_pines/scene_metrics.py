@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+# Accuracy of a class map against the ground truth. Classes are 1 to
+# num_classes in both maps, 0 is an unlabelled (ground truth) or
+# unclassified (prediction) pixel. As in credibility.ipynb the confusion
+# matrix is indexed [predicted class][true class].
+
+
+def class_population(labels, num_classes):
+    # Number of labelled pixels of every class
+    labels = np.asarray(labels).ravel()
+    return np.bincount(labels[labels > 0] - 1, minlength=num_classes)[:num_classes]
+
+
+class ConfusionMatrix(object):
+    """Confusion matrix accumulated over tiles of the scene.
+
+    update() can be called with the whole maps or with any number of tiles
+    (e.g. while the class map is streamed out), the counts add up.
+    """
+
+    def __init__(self, num_classes):
+        self.num_classes = num_classes
+        self.matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+        self.population = np.zeros(num_classes, dtype=np.int64)
+
+    def update(self, labels, predictions):
+        """Adds the pixels of one tile.
+        Args:
+        labels: Ground truth classes of the tile, 0 for unlabelled pixels.
+        predictions: Predicted classes of the same pixels, 0 for unclassified pixels.
+        """
+        labels = np.asarray(labels).ravel().astype(np.int64)
+        predictions = np.asarray(predictions).ravel().astype(np.int64)
+        self.population += class_population(labels, self.num_classes)
+        both = (labels > 0) & (predictions > 0)
+        n = self.num_classes
+        self.matrix += np.bincount((predictions[both] - 1) * n + labels[both] - 1,
+                                   minlength=n * n)[:n * n].reshape(n, n)
+        return self
+
+    def percent(self):
+        # Every column as a percentage of the population of its true class
+        return 100 * self.matrix / np.maximum(self.population, 1)
+
+    def recall(self):
+        # Fraction of the pixels of every class classified correctly (unclassified pixels count as errors)
+        return np.diag(self.matrix) / np.maximum(self.population, 1)
+
+    def overall_accuracy(self):
+        return np.trace(self.matrix) / max(self.population.sum(), 1)
+
+    def average_accuracy(self):
+        return np.mean(self.recall())
+
+    def kappa(self):
+        # Cohen's kappa of all labelled pixels, as overall_accuracy: the unclassified ones form an
+        # extra predicted class that agrees with no true class
+        total = self.population.sum()
+        if total == 0:
+            return 0.
+        observed = np.trace(self.matrix) / total
+        expected = np.dot(self.matrix.sum(axis=1), self.population) / float(total) ** 2
+        return (observed - expected) / (1 - expected) if expected < 1 else 1.
+
+    def summary(self):
+        return ('Overall accuracy: %.2f%%  Average accuracy: %.2f%%  Kappa: %.4f'
+                % (100 * self.overall_accuracy(), 100 * self.average_accuracy(), self.kappa()))
+
+
+def evaluate(labels, predictions, num_classes, tile_rows=None):
+    """Confusion matrix of a class map, optionally accumulated tile_rows rows at a time.
+    Args:
+    labels: Ground truth map (array or memory-mapped array), 0 for unlabelled pixels.
+    predictions: Predicted class map of the same shape, 0 for unclassified pixels.
+    num_classes: Number of classes.
+    tile_rows: Rows read per update, None for the whole map at once.
+    Returns:
+    confusion: ConfusionMatrix of the map.
+    """
+    confusion = ConfusionMatrix(num_classes)
+    step = tile_rows or len(labels)
+    for start in range(0, len(labels), step):
+        confusion.update(labels[start:start+step], predictions[start:start+step])
+    return confusion
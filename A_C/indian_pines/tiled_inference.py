@@ -0,0 +1,170 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from . import ensemble
+from . import patch_extractor
+
+# Out-of-core classification of scenes larger than memory. The cube is read
+# in spatial tiles with a halo of PATCH_SIZE-1 pixels, so that every pixel
+# of a tile gets its full patch, and the class map is written tile by tile
+# to a memory-mapped .npy file. The scaling to [0, 1] and the band means of
+# the notebooks are computed by a streaming pre-pass over row strips.
+
+
+# Largest cube open_cube() loads whole from a .mat file older than v7.3;
+# larger ones are converted to .npy first (python -m indian_pines convert)
+MAX_MAT_BYTES = 2 ** 30
+
+
+class MatlabCube(object):
+    """(height, width, bands) view of a cube in a MATLAB v7.3 (HDF5) file.
+
+    MATLAB stores the array column-major, so h5py sees it as (bands, width,
+    height); slicing rows and columns reads only that block from the file.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.shape = tuple(reversed(dataset.shape))
+        self.dtype = dataset.dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        rows, cols = (key + (slice(None),))[:2] if isinstance(key, tuple) else (key, slice(None))
+        return self.dataset[:, cols, rows].transpose((2, 1, 0))
+
+    def __array__(self, dtype=None, copy=None):
+        cube = self[:]
+        return cube if dtype is None else cube.astype(dtype)
+
+
+def open_cube(path, key='indian_pines', max_mat_bytes=MAX_MAT_BYTES):
+    """Opens a (height, width, bands) cube for tiled reading.
+    Args:
+    path: A .npy file, memory-mapped, a MATLAB v7.3 .mat file, read through h5py, or an
+      older .mat file, which scipy can only load whole.
+    key: Name of the cube in a .mat file.
+    max_mat_bytes: Size above which an older .mat cube is refused instead of loaded, None for no limit.
+    Returns:
+    cube: Array that is read tile by tile with slicing.
+    """
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    with open(path, 'rb') as f:
+        header = f.read(116)
+    if header.startswith(b'MATLAB 7.3'):
+        import h5py
+        return MatlabCube(h5py.File(path, 'r')[key])
+    import scipy.io
+    from . import patch_shards
+    shape, dtype = patch_shards.shard_info(path, key)
+    size = int(np.prod(shape)) * dtype.itemsize
+    if max_mat_bytes is not None and size > max_mat_bytes:
+        raise ValueError('%s holds a %.1f GB cube that scipy can only load whole; convert it to .npy with '
+                         'python -m indian_pines convert --cube %s' % (path, size / 2. ** 30, path))
+    return scipy.io.loadmat(path, variable_names=[key])[key]
+
+
+def convert_cube(path, output_path, key='indian_pines', strip_rows=64):
+    """Writes a cube to a .npy file that open_cube() memory-maps.
+    v7.3 .mat files are copied strip by strip; older ones are loaded whole
+    once, as there is no other way to read them.
+    Args:
+    path: The .mat (or .npy) cube.
+    output_path: The .npy file to write.
+    key: Name of the cube in a .mat file.
+    strip_rows: Rows copied at a time.
+    """
+    cube = open_cube(path, key, max_mat_bytes=None)
+    output = np.lib.format.open_memmap(output_path, mode='w+', dtype=cube.dtype, shape=cube.shape)
+    for start in range(0, cube.shape[0], strip_rows):
+        output[start:start+strip_rows] = cube[start:start+strip_rows]
+    output.flush()
+    del output
+
+
+def scan_statistics(cube, strip_rows=64):
+    """Global minimum and maximum and the band means after scaling, in one pass.
+    Args:
+    cube: The (height, width, bands) cube, or anything sliceable like it.
+    strip_rows: Rows read at a time.
+    Returns:
+    minimum: Minimum of the cube.
+    maximum: Maximum of the cube.
+    mean: Band means of (cube - minimum) / (maximum - minimum), as used by Patch().
+    """
+    height, width, bands = cube.shape
+    minimum, maximum = np.inf, -np.inf
+    sums = np.zeros(bands)
+    for start in range(0, height, strip_rows):
+        strip = np.asarray(cube[start:start+strip_rows])
+        minimum = min(minimum, strip.min())
+        maximum = max(maximum, strip.max())
+        sums += strip.sum(axis=(0, 1), dtype=np.float64)
+    mean = (sums / (height * width) - minimum) / (maximum - minimum)
+    return minimum, maximum, mean
+
+
+def tiles(height, width, tile_size):
+    # (row start, row end, column start, column end) of the output tiles
+    for r0 in range(0, height, tile_size):
+        for c0 in range(0, width, tile_size):
+            yield r0, min(r0 + tile_size, height), c0, min(c0 + tile_size, width)
+
+
+def classify_scene(cube, patch_size, checkpoint, output_path, tile_size=256, batch_size=1024, target=None,
+                   statistics=None, layers=ensemble.LAYERS):
+    """Classifies a scene tile by tile into a memory-mapped class map.
+    Args:
+    cube: The (height, width, bands) cube, from open_cube().
+    patch_size: Patch size of the model.
+    checkpoint: Checkpoint of the model.
+    output_path: .npy file of the class map.
+    tile_size: Side of the output tiles; the tiles read are patch_size-1 pixels larger.
+    batch_size: Number of patches per sess.run.
+    target: Optional ground truth; if given only its labelled pixels are classified, like decoder().
+    statistics: (minimum, maximum, mean) from scan_statistics(), computed if not given.
+    layers: conv1, conv2, fc1 and fc2 of the model.
+    Returns:
+    outputs: The memory-mapped uint8 class map, 1-16 for the classified pixels and 0 elsewhere
+      (unlabelled pixels and the border where the patches do not fit).
+    """
+    import tensorflow as tf
+    from . import model
+    height, width, bands = cube.shape
+    minimum, maximum, mean = statistics if statistics is not None else scan_statistics(cube)
+    c = int((patch_size - 1) / 2)
+    outputs = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.uint8, shape=(height, width))
+
+    model.set_patch_size(patch_size)
+    with tf.Graph().as_default():
+        images_placeholder = tf.placeholder(tf.float32, shape=(None, model.IMAGE_PIXELS))
+        predictions = tf.argmax(model.inference(images_placeholder, *layers), 1) + 1
+        saver = tf.train.Saver()
+        with tf.Session() as sess:
+            saver.restore(sess, checkpoint)
+            for r0, r1, c0, c1 in tiles(height, width, tile_size):
+                # corners of the patches centred in the tile that fit in the scene
+                i0, i1 = max(r0 - c, 0), min(r1 - c, height - patch_size + 1)
+                j0, j1 = max(c0 - c, 0), min(c1 - c, width - patch_size + 1)
+                if i0 >= i1 or j0 >= j1:
+                    continue
+                block = (np.asarray(cube[i0:i1 + patch_size - 1, j0:j1 + patch_size - 1], dtype=np.float64)
+                         - minimum) / (maximum - minimum)
+                patches = patch_extractor.PatchExtractor(block, patch_size, mean)
+                if target is None:
+                    corners = np.indices((i1 - i0, j1 - j0)).reshape(2, -1).T
+                else:
+                    corners = np.argwhere(target[i0 + c:i1 + c, j0 + c:j1 + c] != 0)
+                for start in range(0, len(corners), batch_size):
+                    batch = corners[start:start+batch_size]
+                    image_patches = patches.batch(batch[:, 0], batch[:, 1]).reshape(len(batch), -1)
+                    outputs[batch[:, 0] + i0 + c, batch[:, 1] + j0 + c] = sess.run(
+                        predictions, feed_dict={images_placeholder: image_patches})
+                outputs.flush()
+    return outputs
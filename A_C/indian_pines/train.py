@@ -0,0 +1,180 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import os
+import time
+import traceback
+
+# Trains the IndianPinesCNN model of several patch sizes at once, one
+# process per model:
+#   python -m indian_pines train --patch-sizes 5 11 21 31 37 --workers 3
+# The shards of every patch size are prepared first (or reused if they
+# exist). Workers are spawned and limited to their share of threads before
+# they import TensorFlow; each one writes the checkpoints
+# ./model-spatial-CNN-<P>X<P>.ckpt-<step> that the decoder and the ensemble
+# restore.
+
+PATCH_SIZES = [5, 11, 21, 31, 37]
+
+# Same model and training parameters as CNN_feed.ipynb
+LEARNING_RATE = 0.01
+MAX_STEPS = 4000
+BATCH_SIZE = 100
+LAYERS = (500, 100, 200, 84)
+
+
+def scaled_scene(data_path):
+    # Indian Pines image scaled to [0, 1] and its ground truth
+    import numpy as np
+    import scipy.io
+    input_mat = scipy.io.loadmat(os.path.join(data_path, 'Indian_pines.mat'))['indian_pines']
+    target_mat = scipy.io.loadmat(os.path.join(data_path, 'Indian_pines_gt.mat'))['indian_pines_gt']
+    input_mat = input_mat.astype(float)
+    input_mat -= np.min(input_mat)
+    input_mat /= np.max(input_mat)
+    return input_mat, target_mat
+
+
+def ensure_shards(patch_sizes, data_path, rebuild=False):
+    """Prepares the shards of the patch sizes that do not have them yet.
+    Returns:
+    built: The patch sizes whose shards were written.
+    """
+    from . import dataset_builder
+    from . import patch_shards
+    missing = [patch_size for patch_size in patch_sizes
+               if rebuild or not all(patch_shards.exists(patch_shards.shard_folder(data_path, patch_size), split)
+                                     for split in ['train', 'test'])]
+    if missing:
+        input_mat, target_mat = scaled_scene(data_path)
+        for patch_size in missing:
+            start = time.time()
+            dataset_builder.prepare(input_mat, target_mat, patch_size, data_path)
+            print('Prepared the %dx%d shards in %.1f s' % (patch_size, patch_size, time.time() - start))
+    return missing
+
+
+def init_worker(threads):
+    # Runs in every worker before TensorFlow is imported
+    for var in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]:
+        os.environ[var] = str(threads)
+
+
+def do_eval(sess, eval_correct, images_placeholder, labels_placeholder, data_set, batch_size):
+    # Precision @ 1 over the whole batches of one epoch of data_set
+    steps_per_epoch = data_set.num_examples // batch_size
+    true_count = 0
+    for step in range(steps_per_epoch):
+        images_feed, labels_feed = data_set.next_batch(batch_size)
+        true_count += sess.run(eval_correct, feed_dict={images_placeholder: images_feed,
+                                                        labels_placeholder: labels_feed})
+    return true_count / (steps_per_epoch * batch_size)
+
+
+def train_model(patch_size, data_path, model_path, threads, max_steps=MAX_STEPS, batch_size=BATCH_SIZE,
+                learning_rate=LEARNING_RATE, layers=LAYERS):
+    """Trains the model of one patch size from its shards, like run_training() in CNN_feed.ipynb.
+    Returns:
+    precision: Precision @ 1 on the test shards after the last step, None if max_steps is 0.
+    """
+    import tensorflow as tf
+    from . import ensemble
+    from . import model
+    from . import patch_shards
+
+    folder = patch_shards.shard_folder(data_path, patch_size)
+    training_data = patch_shards.ShardedDataSet(folder, 'train')
+    test_data = patch_shards.ShardedDataSet(folder, 'test')
+    model.set_patch_size(patch_size)
+    name = ensemble.key(patch_size)
+
+    with tf.Graph().as_default():
+        images_placeholder = tf.placeholder(tf.float32, shape=(batch_size, model.IMAGE_PIXELS))
+        labels_placeholder = tf.placeholder(tf.int32, shape=(batch_size))
+        logits = model.inference(images_placeholder, *layers)
+        loss = model.loss(logits, labels_placeholder)
+        train_op = model.training(loss, learning_rate)
+        eval_correct = model.evaluation(logits, labels_placeholder)
+        saver = tf.train.Saver()
+        config = tf.ConfigProto(intra_op_parallelism_threads=threads, inter_op_parallelism_threads=1)
+        with tf.Session(config=config) as sess:
+            sess.run(tf.global_variables_initializer())
+            precision = None
+            for step in range(max_steps):
+                images_feed, labels_feed = training_data.next_batch(batch_size)
+                _, loss_value = sess.run([train_op, loss], feed_dict={images_placeholder: images_feed,
+                                                                      labels_placeholder: labels_feed})
+                if step % 50 == 0:
+                    print('%s step %d: loss = %.2f' % (name, step, loss_value))
+                if (step + 1) % 1000 == 0 or (step + 1) == max_steps:
+                    # a state file per patch size, as the workers save into the same folder
+                    saver.save(sess, os.path.join(model_path, 'model-spatial-CNN-' + str(patch_size) + 'X'
+                                                  + str(patch_size) + '.ckpt'), global_step=step,
+                               latest_filename='checkpoint_' + name)
+                    precision = do_eval(sess, eval_correct, images_placeholder, labels_placeholder, test_data,
+                                        batch_size)
+                    print('%s step %d: test precision @ 1 = %0.04f' % (name, step, precision))
+    return precision
+
+
+def run_task(task):
+    patch_size, data_path, model_path, threads, options = task
+    start = time.time()
+    try:
+        precision = train_model(patch_size, data_path, model_path, threads, **options)
+        error = None
+    except Exception:
+        precision, error = None, traceback.format_exc()
+    return patch_size, precision, time.time() - start, error
+
+
+def add_arguments(parser):
+    parser.add_argument("--patch-sizes", nargs="+", type=int, default=PATCH_SIZES)
+    parser.add_argument("--workers", type=int, default=0, help="models trained at the same time (default: one per core, at most one per patch size)")
+    parser.add_argument("--threads", type=int, default=0, help="TensorFlow threads per model (default: cores / workers)")
+    parser.add_argument("--max-steps", type=int, default=MAX_STEPS)
+    parser.add_argument("--data-path", default=os.path.join(os.getcwd(), "Data"))
+    parser.add_argument("--model-path", default="./")
+    parser.add_argument("--rebuild-shards", action="store_true", help="prepare the shards even if they exist")
+
+
+def run(args):
+    if args.max_steps < 1:
+        raise SystemExit('--max-steps must be at least 1')
+    ensure_shards(args.patch_sizes, args.data_path, args.rebuild_shards)
+
+    num_cores = multiprocessing.cpu_count()
+    workers = args.workers or min(num_cores, len(args.patch_sizes))
+    threads = args.threads or max(1, num_cores // workers)
+    print(str(len(args.patch_sizes)) + " models on " + str(workers) + " workers with " + str(threads) + " threads each")
+
+    # a fresh process per model, the model module keeps the patch size in globals
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(workers, initializer=init_worker, initargs=(threads,), maxtasksperchild=1)
+    tasks = [(patch_size, args.data_path, args.model_path, threads, {"max_steps": args.max_steps})
+             for patch_size in args.patch_sizes]
+    failed = []
+    for patch_size, precision, elapsed, error in pool.imap_unordered(run_task, tasks):
+        if error:
+            print('%dx%d failed after %.1f s' % (patch_size, patch_size, elapsed))
+            print(error)
+            failed.append(patch_size)
+        else:
+            print('%dx%d done in %.1f s, test precision @ 1 = %0.04f' % (patch_size, patch_size, elapsed, precision))
+    pool.close()
+    pool.join()
+    if failed:
+        print('Failed patch sizes: ' + ' '.join(str(patch_size) for patch_size in failed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trains the Indian Pines CNN of several patch sizes in parallel.")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
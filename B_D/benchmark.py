@@ -0,0 +1,499 @@
+import tensorflow as tf
+import numpy as np
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import utils_attack
+import utils_cache
+import utils_eval
+import utils_idx
+import utils_input
+import utils_plot
+import utils_train
+from cleverhans.attacks import FastGradientMethod
+from cleverhans.model import Model
+
+# Micro-benchmarks for the shared components used by the B_D scripts.
+# Usage: python benchmark.py <name> [args...]
+
+# 50001 steps with a checkpoint every 500 steps
+num_checkpoints_50k = 101
+
+
+class ToyClassifier(Model):
+    # Same shape as mnist_nn_one_hidden, built with plain variables so the
+    # benchmarks do not need a dataset
+    def __init__(self, num_hidden=16):
+        self.W1 = tf.Variable(tf.truncated_normal([784, num_hidden], stddev=0.1))
+        self.B1 = tf.Variable(tf.zeros([num_hidden]))
+        self.W2 = tf.Variable(tf.truncated_normal([num_hidden, 10], stddev=0.1))
+        self.B2 = tf.Variable(tf.zeros([10]))
+        self.G_B1 = tf.Variable(tf.zeros([784]))
+        self.G_B2 = tf.Variable(tf.zeros([num_hidden]))
+
+    def get_logits(self, x):
+        XX = tf.reshape(x, [-1, 784])
+        H1 = tf.nn.sigmoid(tf.matmul(XX, self.W1) + self.B1)
+        return tf.matmul(H1, self.W2) + self.B2
+
+    def generate_logits(self, y):
+        # Tied-weight generator, as in the biprop scripts
+        GH1 = tf.nn.sigmoid(tf.matmul(y, tf.transpose(self.W2)) + self.G_B2)
+        return tf.reshape(tf.matmul(GH1, tf.transpose(self.W1)) + self.G_B1, [-1, 28, 28, 1])
+
+
+def run_fgsm_checkpoints(x_test, fgsm_params, num_checkpoints, persistent):
+    with tf.Graph().as_default() as graph, tf.Session() as sess:
+        model = ToyClassifier()
+        sess.run(tf.global_variables_initializer())
+        if persistent:
+            fgsm_eval = utils_attack.FGSMEvaluator(model, sess, [None, 28, 28, 1], fgsm_params)
+        ops_start = utils_attack.graph_size(graph)
+
+        times = []
+        for _ in range(num_checkpoints):
+            start = time.time()
+            if persistent:
+                fgsm_eval.generate_np(x_test)
+            else:
+                attack_fgsm = FastGradientMethod(model, sess=sess)
+                attack_fgsm.generate_np(x_test, **fgsm_params)
+            times.append(time.time() - start)
+        return ops_start, utils_attack.graph_size(graph), times
+
+
+def bench_fgsm(num_checkpoints=num_checkpoints_50k, num_test=10000):
+    # Compares a new FastGradientMethod per checkpoint against FGSMEvaluator
+    np.random.seed(0)
+    x_test = np.random.random_sample((num_test, 28, 28, 1)).astype(np.float32)
+    fgsm_params = {'eps': 0.3,
+                   'clip_min': 0.,
+                   'clip_max': 1.}
+
+    results = {}
+    for name, persistent in [("per-checkpoint", False), ("persistent", True)]:
+        ops_start, ops_end, times = run_fgsm_checkpoints(x_test, fgsm_params, num_checkpoints, persistent)
+        results[name] = (ops_end - ops_start, sum(times))
+        print(name + " - graph ops: " + str(ops_start) + " -> " + str(ops_end)
+              + "\tfirst checkpoint: %.3fs\tlast checkpoint: %.3fs\ttotal: %.2fs" % (times[0], times[-1], sum(times)))
+
+    ops_saved = results["per-checkpoint"][0] - results["persistent"][0]
+    time_saved = results["per-checkpoint"][1] - results["persistent"][1]
+    print("Over " + str(num_checkpoints) + " checkpoints: " + str(ops_saved) + " graph ops and %.2fs saved" % time_saved)
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+
+def bench_eval(eval_batch_size=1000, num_test=10000):
+    # Batched evaluation runs first because ru_maxrss only ever grows
+    np.random.seed(0)
+    x_test = np.random.random_sample((num_test, 28, 28, 1)).astype(np.float32)
+    y_test = np.eye(10)[np.random.randint(10, size=num_test)].astype(np.float32)
+    fgsm_params = {'eps': 0.3,
+                   'clip_min': 0.,
+                   'clip_max': 1.}
+
+    with tf.Graph().as_default(), tf.Session() as sess:
+        model = ToyClassifier(num_hidden=1024)
+        X = tf.placeholder(tf.float32, [None, 28, 28, 1])
+        Y_ = tf.placeholder(tf.float32, [None, 10])
+        Ylogits = model.get_logits(X)
+        Ysoftmax = tf.nn.softmax(Ylogits)
+        correct_prediction = tf.equal(tf.argmax(Ysoftmax, 1), tf.argmax(Y_, 1))
+        accuracy = tf.reduce_mean(tf.cast(correct_prediction, tf.float32))
+        max_output_sigmoid = tf.reduce_max(tf.nn.sigmoid(Ylogits))
+        max_output_softmax = tf.reduce_max(Ysoftmax)
+        fetches = [accuracy, max_output_sigmoid, max_output_softmax]
+
+        fgsm_eval = utils_attack.FGSMEvaluator(model, sess, [None, 28, 28, 1], fgsm_params)
+        evaluator = utils_eval.BatchedEvaluator(sess, X, Y_, correct_prediction, accuracy=accuracy,
+                                                max_sigmoid=max_output_sigmoid, max_softmax=max_output_softmax,
+                                                batch_size=eval_batch_size)
+        sess.run(tf.global_variables_initializer())
+        rss_start = peak_rss_mb()
+
+        start = time.time()
+        batched = evaluator.run(fetches, x_test, y_test, transform=fgsm_eval.generate_np)
+        batched_time = time.time() - start
+        batched_rss = peak_rss_mb()
+
+        start = time.time()
+        full = sess.run(fetches, {X: fgsm_eval.generate_np(x_test), Y_: y_test})
+        full_time = time.time() - start
+        full_rss = peak_rss_mb()
+
+    print("batched (" + str(eval_batch_size) + ") - accuracy, sigmoid, softmax: " + str(batched)
+          + "\tpeak RSS +%.1f MB\t%.2fs" % (batched_rss - rss_start, batched_time))
+    print("full set - accuracy, sigmoid, softmax: " + str(full)
+          + "\tpeak RSS +%.1f MB\t%.2fs" % (full_rss - rss_start, full_time))
+
+
+def bench_fgsm_curve(num_eps=9, num_test=10000, eval_batch_size=1000):
+    # One FGSMEvaluator.generate_np per epsilon against one gradient sign for all of them
+    np.random.seed(0)
+    x_test = np.random.random_sample((num_test, 28, 28, 1)).astype(np.float32)
+    y_test = np.eye(10)[np.random.randint(10, size=num_test)].astype(np.float32)
+    epsilons = [0.3 * k / 4. for k in range(num_eps)]
+
+    with tf.Graph().as_default(), tf.Session() as sess:
+        model = ToyClassifier(num_hidden=1024)
+        X = tf.placeholder(tf.float32, [None, 28, 28, 1])
+        Y_ = tf.placeholder(tf.float32, [None, 10])
+        Ylogits = model.get_logits(X)
+        Ysoftmax = tf.nn.softmax(Ylogits)
+        correct_prediction = tf.equal(tf.argmax(Ysoftmax, 1), tf.argmax(Y_, 1))
+        accuracy = tf.reduce_mean(tf.cast(correct_prediction, tf.float32))
+        max_output_sigmoid = tf.reduce_max(tf.nn.sigmoid(Ylogits))
+        max_output_softmax = tf.reduce_max(Ysoftmax)
+        fetches = [accuracy, max_output_sigmoid, max_output_softmax]
+        evaluator = utils_eval.BatchedEvaluator(sess, X, Y_, correct_prediction, accuracy=accuracy,
+                                                max_sigmoid=max_output_sigmoid, max_softmax=max_output_softmax,
+                                                batch_size=eval_batch_size)
+        fgsm_evals = [utils_attack.FGSMEvaluator(model, sess, [None, 28, 28, 1], {'eps': eps, 'clip_min': 0., 'clip_max': 1.})
+                      for eps in epsilons]
+        curve_eval = utils_attack.FGSMCurveEvaluator(model, sess, [None, 28, 28, 1], epsilons)
+        sess.run(tf.global_variables_initializer())
+
+        start = time.time()
+        per_eps = [evaluator.run(fetches, x_test, y_test, transform=fgsm_eval.generate_np) for fgsm_eval in fgsm_evals]
+        per_eps_time = time.time() - start
+        start = time.time()
+        curve = curve_eval.evaluate(evaluator, x_test, y_test)
+        curve_time = time.time() - start
+
+    for eps, old, new in zip(epsilons, per_eps, curve):
+        print("eps=%.4f - generate_np per eps: %s\tshared sign: %s" % (eps, old, new[1:]))
+    print(str(num_eps) + " epsilons - generate_np per eps: %.2fs\tshared sign: %.2fs (%.1fx)"
+          % (per_eps_time, curve_time, per_eps_time / curve_time))
+
+
+def bench_iterative(nb_iter=10, num_test=10000, eval_batch_size=1000):
+    # Iterative attack with and without early exit of the misclassified examples
+    np.random.seed(0)
+    x_test = np.random.random_sample((num_test, 28, 28, 1)).astype(np.float32)
+    with tf.Graph().as_default(), tf.Session() as sess:
+        model = ToyClassifier(num_hidden=1024)
+        evaluators = [(name, utils_attack.IterativeAttackEvaluator(model, sess, [None, 28, 28, 1], 0.3, 2.5 * 0.3 / nb_iter, nb_iter,
+                                                                   batch_size=eval_batch_size, early_exit=early_exit))
+                      for name, early_exit in [("all iterations", False), ("early exit", True)]]
+        X = tf.placeholder(tf.float32, [None, 28, 28, 1])
+        predictions = tf.argmax(model.get_logits(X), 1)
+        sess.run(tf.global_variables_initializer())
+        # labels of the untrained model's predictions, so that every example starts correctly classified
+        y_test = np.eye(10)[sess.run(predictions, {X: x_test})].astype(np.float32)
+
+        for name, evaluator in evaluators:
+            start = time.time()
+            accuracy, sigmoid, softmax, evaluated, passes = evaluator.evaluate(x_test, y_test)
+            print(name + " - accuracy: " + str(accuracy) + "\tsigmoid: " + str(sigmoid) + "\tsoftmax: " + str(softmax)
+                  + "\tforward passes per image: %.2f\t%.2fs" % (passes, time.time() - start))
+        budget = 0.25
+        start = time.time()
+        accuracy, sigmoid, softmax, evaluated, passes = evaluators[1][1].evaluate(x_test, y_test, time_budget=budget)
+        print("early exit, %.2fs budget - %d images in %.2fs, accuracy: %s" % (budget, evaluated, time.time() - start, accuracy))
+
+
+def run_training_steps(train_input, num_steps):
+    # Times one classifier and one generator update per step, as in biprop
+    X = train_input.images_placeholder([None, 28, 28, 1])
+    Y_ = train_input.labels_placeholder([None, 10])
+    GX_ = train_input.images_placeholder([None, 28, 28, 1])
+    GY = train_input.labels_placeholder([None, 10])
+    model = ToyClassifier()
+    c_loss = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits(logits=model.get_logits(X), labels=Y_))
+    g_loss = tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=model.generate_logits(GY), labels=GX_))
+    c_train = tf.train.AdamOptimizer(0.003).minimize(c_loss)
+    g_train = tf.train.AdamOptimizer(0.003).minimize(g_loss)
+
+    with tf.Session() as sess:
+        sess.run(tf.global_variables_initializer())
+        train_input.start(sess)
+        start = time.time()
+        for i in range(num_steps):
+            batch_X, batch_Y = train_input.next_batch()
+            sess.run(c_train, train_input.feed({X: batch_X, Y_: batch_Y}))
+            sess.run(g_train, train_input.feed({GY: batch_Y, GX_: batch_X}))
+        return num_steps / (time.time() - start)
+
+
+def bench_input(num_steps=5000, num_train=60000, batch_size=100):
+    np.random.seed(0)
+    x_train = np.random.random_sample((num_train, 28, 28, 1)).astype(np.float32)
+    y_train = np.eye(10)[np.random.randint(10, size=num_train)].astype(np.float32)
+
+    with tf.Graph().as_default():
+        feed_dict_rate = run_training_steps(utils_input.ArrayBatches(x_train, y_train, batch_size), num_steps)
+    with tf.Graph().as_default():
+        pipeline_rate = run_training_steps(utils_input.InputPipeline(x_train, y_train, batch_size), num_steps)
+
+    print("feed_dict: %.1f steps/sec" % feed_dict_rate)
+    print("pipeline:  %.1f steps/sec (%.2fx)" % (pipeline_rate, pipeline_rate / feed_dict_rate))
+
+
+def bench_uint8(num_epochs=3, num_train=50000, batch_size=100):
+    # CIFAR-sized training set: uint8 batches converted one at a time against
+    # the float32 array and its copy per epoch. uint8 runs first because
+    # ru_maxrss only ever grows
+    np.random.seed(0)
+    x_train = np.random.randint(256, size=(num_train, 32, 32, 3)).astype(np.uint8)
+    y_train = np.eye(10)[np.random.randint(10, size=num_train)].astype(np.float32)
+    num_batches = num_epochs * (num_train // batch_size)
+    rss_start = peak_rss_mb()
+
+    start = time.time()
+    train_input = utils_input.ArrayBatches(x_train, y_train, batch_size)
+    for _ in range(num_batches):
+        train_input.next_batch()
+    uint8_time = time.time() - start
+    uint8_rss = peak_rss_mb()
+
+    start = time.time()
+    x_float = x_train.astype('float32')
+    x_float /= 255
+    for step in range(num_batches):
+        idx = step % (num_train // batch_size)
+        if idx == 0:
+            order = np.random.permutation(num_train)
+            images, labels = x_float[order], y_train[order]
+        batch = images[idx*batch_size:(idx+1)*batch_size].copy(), labels[idx*batch_size:(idx+1)*batch_size].copy()
+    float_time = time.time() - start
+    float_rss = peak_rss_mb()
+
+    print("uint8, per batch:   peak RSS +%.0f MB\t%d batches in %.2fs" % (uint8_rss - rss_start, num_batches, uint8_time))
+    print("float32, per epoch: peak RSS +%.0f MB\t%d batches in %.2fs" % (float_rss - rss_start, num_batches, float_time))
+
+
+def pss_mb():
+    # Proportional set size: pages shared by several processes count once in total
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024.
+
+
+def decode_source(source):
+    # Stands in for a dataset loader: read the raw pixels and normalize the test set
+    data = np.load(source)
+    return {"x_train": data["x_train"], "x_test": utils_input.to_float(data["x_test"])}
+
+
+def load_dataset_worker(task):
+    source, root, cached = task
+    start = time.time()
+    if cached:
+        arrays = utils_cache.cached_arrays("bench", [source], lambda: decode_source(source), root)
+    else:
+        arrays = decode_source(source)
+    # touches every page, as training and evaluation do
+    checksum = sum(float(array.sum()) for array in arrays.values())
+    return time.time() - start, pss_mb(), checksum
+
+
+def bench_cache(num_procs=6, num_train=50000, num_test=10000):
+    # Concurrent runs each decoding a CIFAR-sized dataset against all of them mapping one cache
+    import multiprocessing
+    folder = tempfile.mkdtemp()
+    try:
+        np.random.seed(0)
+        source = os.path.join(folder, "source.npz")
+        np.savez(source, x_train=np.random.randint(256, size=(num_train, 32, 32, 3)).astype(np.uint8),
+                 x_test=np.random.randint(256, size=(num_test, 32, 32, 3)).astype(np.uint8))
+        root = os.path.join(folder, "cache")
+        start = time.time()
+        utils_cache.cached_arrays("bench", [source], lambda: decode_source(source), root)
+        print("cache build: %.2fs" % (time.time() - start))
+
+        context = multiprocessing.get_context("spawn")
+        for name, cached in [("private copies", False), ("shared cache", True)]:
+            pool = context.Pool(num_procs)
+            results = pool.map(load_dataset_worker, [(source, root, cached)] * num_procs)
+            pool.close()
+            pool.join()
+            print(name + " - %d processes: load %.2fs on average\ttotal PSS %.0f MB"
+                  % (num_procs, sum(r[0] for r in results) / num_procs, sum(r[1] for r in results)))
+    finally:
+        shutil.rmtree(folder)
+
+
+def write_idx(path, array):
+    # uint8 IDX file: zero bytes, type 0x08, number of dimensions, big-endian sizes, values
+    with open(path, "wb") as f:
+        f.write(bytearray([0, 0, 0x08, array.ndim]) + np.array(array.shape, ">u4").tobytes())
+        f.write(array.tobytes())
+
+
+def bench_idx(num_steps=5000, batch_size=100):
+    # MNIST-sized IDX files: memory-mapped views against the tutorial input_data,
+    # which decodes the .gz files into float32 arrays. The views run first
+    # because ru_maxrss only ever grows
+    import gzip
+    from tensorflow.examples.tutorials.mnist import input_data
+    folder = tempfile.mkdtemp()
+    try:
+        np.random.seed(0)
+        raw_folder, gz_folder = os.path.join(folder, "raw"), os.path.join(folder, "gz")
+        os.makedirs(raw_folder)
+        os.makedirs(gz_folder)
+        for key, num in [("train", 60000), ("t10k", 10000)]:
+            write_idx(os.path.join(raw_folder, key + "-images-idx3-ubyte"), np.random.randint(256, size=(num, 28, 28)).astype(np.uint8))
+            write_idx(os.path.join(raw_folder, key + "-labels-idx1-ubyte"), np.random.randint(10, size=num).astype(np.uint8))
+        for name in os.listdir(raw_folder):
+            with open(os.path.join(raw_folder, name), "rb") as f, gzip.open(os.path.join(gz_folder, name + ".gz"), "wb") as g:
+                g.write(f.read())
+        rss_start = peak_rss_mb()
+
+        start = time.time()
+        arrays = utils_idx.read_mnist(raw_folder)
+        x_test, y_test = np.asarray(arrays["x_test"]), np.asarray(arrays["y_test"])
+        idx_load = time.time() - start
+        np.random.seed(1)
+        train_input = utils_input.EpochBatches(arrays["x_train"], arrays["y_train"], batch_size)
+        start = time.time()
+        idx_batches = []
+        for step in range(num_steps):
+            batch = train_input.next_batch()
+            # the first batches are kept to compare the two paths
+            if step < 10:
+                idx_batches.append(batch)
+        idx_time = time.time() - start
+        idx_rss = peak_rss_mb()
+
+        start = time.time()
+        mnist = input_data.read_data_sets(gz_folder, one_hot=True, reshape=False, validation_size=0)
+        tutorial_load = time.time() - start
+        np.random.seed(1)
+        start = time.time()
+        tutorial_batches = []
+        for step in range(num_steps):
+            batch = mnist.train.next_batch(batch_size)
+            if step < 10:
+                tutorial_batches.append(batch)
+        tutorial_time = time.time() - start
+        tutorial_rss = peak_rss_mb()
+
+        same = all(np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1]) for a, b in zip(idx_batches, tutorial_batches))
+        same = same and np.array_equal(x_test, mnist.test.images) and np.array_equal(y_test, mnist.test.labels)
+        print("IDX views: load %.3fs\t%d batches in %.2fs\tpeak RSS +%.0f MB" % (idx_load, num_steps, idx_time, idx_rss - rss_start))
+        print("input_data: load %.3fs\t%d batches in %.2fs\tpeak RSS +%.0f MB" % (tutorial_load, num_steps, tutorial_time, tutorial_rss - idx_rss))
+        print("same batches and test set: " + str(same))
+    finally:
+        shutil.rmtree(folder)
+
+
+def run_config_steps(config_num, fused_step, num_steps, x_train, y_train, batch_size):
+    # Mirrors the train step of the biprop scripts for one entry of config_dict
+    train_input = utils_input.ArrayBatches(x_train, y_train, batch_size)
+    X = train_input.images_placeholder([None, 28, 28, 1])
+    Y_ = train_input.labels_placeholder([None, 10])
+    GX_ = train_input.images_placeholder([None, 28, 28, 1])
+    GY = train_input.labels_placeholder([None, 10])
+    model = ToyClassifier()
+    c_loss = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits(logits=model.get_logits(X), labels=Y_))
+
+    def g_loss_fn(read=None):
+        # with read, on the weights read after the classifier update
+        generator = utils_train.with_reads(model, read) if read is not None else model
+        return tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=generator.generate_logits(GY), labels=GX_))
+
+    c_optimizer = tf.train.AdamOptimizer(0.003)
+    g_optimizer = tf.train.AdamOptimizer(0.003)
+    if fused_step:
+        c_train, fused_train = utils_train.sequential_minimize([(c_optimizer, lambda read: c_loss, None),
+                                                                (g_optimizer, g_loss_fn, None)])
+    else:
+        c_train = c_optimizer.minimize(c_loss)
+        g_train = g_optimizer.minimize(g_loss_fn())
+
+    with tf.Session() as sess:
+        sess.run(tf.global_variables_initializer())
+        start = time.time()
+        for i in range(num_steps):
+            batch_X, batch_Y = train_input.next_batch()
+            generator_step = config_num == 1 or (config_num == 2 and i < num_steps // 2) or\
+                config_num == 4 or (config_num == 5 and i < num_steps // 2)
+            if fused_step and generator_step:
+                sess.run(fused_train, {X: batch_X, Y_: batch_Y, GY: batch_Y, GX_: batch_X})
+            else:
+                sess.run(c_train, {X: batch_X, Y_: batch_Y})
+                if generator_step:
+                    sess.run(g_train, {GY: batch_Y, GX_: batch_X})
+        return num_steps / (time.time() - start), sess.run(tf.trainable_variables())
+
+
+def bench_fused(num_steps=5000, num_train=60000, batch_size=100):
+    # Configs 3-5 make the same calls as 0-2, only their variable lists differ
+    config_dict = {0: "backprop", 1: "biprop", 2: "halfbiprop"}
+    np.random.seed(0)
+    x_train = np.random.random_sample((num_train, 28, 28, 1)).astype(np.float32)
+    y_train = np.eye(10)[np.random.randint(10, size=num_train)].astype(np.float32)
+
+    for config_num in sorted(config_dict):
+        rates, params = [], []
+        for fused_step in [False, True]:
+            with tf.Graph().as_default():
+                # same initial weights and batch order for both
+                tf.set_random_seed(0)
+                np.random.seed(1)
+                rate, values = run_config_steps(config_num, fused_step, num_steps, x_train, y_train, batch_size)
+            rates.append(rate)
+            params.append(values)
+        same = all(np.allclose(a, b, rtol=1e-5, atol=1e-6) for a, b in zip(*params))
+        print(config_dict[config_num] + " - separate: %.1f steps/sec\tfused: %.1f steps/sec (%.2fx)\tsame parameters after %d steps: %s"
+              % (rates[0], rates[1], rates[1] / rates[0], num_steps, same))
+
+
+def run_plot_checkpoints(plots, folder, num_checkpoints, steps_per_checkpoint):
+    # The images of mnist_nn_one_hidden: generated samples, C_W1 (4x4 grid) and adversarial images
+    samples = np.random.random_sample((10, 784)).astype(np.float32)
+    weights = np.random.randn(784, 16).astype(np.float32)
+    a = np.random.random_sample((100, 784)).astype(np.float32)
+    b = np.random.random_sample((784, 100)).astype(np.float32)
+    start = time.time()
+    for i in range(num_checkpoints):
+        name = os.path.join(folder, str(i).zfill(6) + ".png")
+        plots.generator(samples, [28, 28, 1], (2, 5), name.replace(".png", "_gen.png"))
+        plots.first_hidden(weights, [28, 28, 1], (4, 4), name.replace(".png", "_hidden.png"))
+        plots.generator(samples, [28, 28, 1], (2, 5), name.replace(".png", "_adv.png"))
+        # stands in for the training steps until the next checkpoint
+        for _ in range(steps_per_checkpoint):
+            np.dot(a, b)
+    loop_time = time.time() - start
+    render_time, blocked_time = plots.close()
+    return loop_time, time.time() - start, render_time, blocked_time
+
+
+def bench_plot(num_checkpoints=20, steps_per_checkpoint=500):
+    np.random.seed(0)
+    folder = tempfile.mkdtemp()
+    try:
+        for renderer in ["figure", "mosaic"]:
+            for background in [False, True]:
+                loop_time, total_time, render_time, blocked_time = run_plot_checkpoints(
+                    utils_plot.plot_writer(background, renderer), folder, num_checkpoints, steps_per_checkpoint)
+                print(renderer + ", " + ("background" if background else "synchronous")
+                      + " - loop: %.2fs (%.1f ms/checkpoint)\ttotal: %.2fs\trendering: %.2fs\ton the loop: %.2fs"
+                      % (loop_time, 1000 * loop_time / num_checkpoints, total_time, render_time, blocked_time))
+    finally:
+        shutil.rmtree(folder)
+
+
+benchmarks = {"fgsm": bench_fgsm,
+              "eval": bench_eval,
+              "fgsm_curve": bench_fgsm_curve,
+              "iterative": bench_iterative,
+              "input": bench_input,
+              "uint8": bench_uint8,
+              "cache": bench_cache,
+              "idx": bench_idx,
+              "fused": bench_fused,
+              "plot": bench_plot}
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else "fgsm"
+    benchmarks[name](*[int(arg) for arg in sys.argv[2:]])
@@ -0,0 +1,133 @@
+import os
+import numpy as np
+import utils_cache
+import utils_idx
+import utils_input
+
+# Datasets of the B_D experiments, loaded at most once per process. The
+# Keras and MNIST tutorial imports are deferred until a dataset is used.
+# By default the decoded arrays come from the read-only cache of
+# utils_cache, which concurrent runs map instead of each loading a copy.
+
+
+class ImageDataset(object):
+    """Train and test images with one-hot labels.
+
+    Test images are float32 in [0, 1]; training images may also be uint8
+    pixels, which the training inputs convert one batch at a time.
+    """
+
+    def __init__(self, name, x_train, y_train, x_test, y_test, fgsm_eps):
+        self.name = name
+        self.x_train = x_train
+        self.y_train = y_train
+        self.x_test = x_test
+        self.y_test = y_test
+        self.fgsm_eps = fgsm_eps
+        self.image_shape = list(x_train.shape[1:])
+        self.num_classes = y_train.shape[1]
+
+    def train_input(self, batch_size, use_pipeline=False):
+        # A new input per run, so every run starts from the first epoch
+        if use_pipeline:
+            return utils_input.InputPipeline(self.x_train, self.y_train, batch_size)
+        return utils_input.ArrayBatches(self.x_train, self.y_train, batch_size)
+
+
+class MNISTDataset(ImageDataset):
+    """MNIST, batched like the tutorial mnist.train.next_batch the scripts used."""
+
+    def __init__(self, x_train, y_train, x_test, y_test):
+        ImageDataset.__init__(self, "mnist", x_train, y_train, x_test, y_test, fgsm_eps=0.3)
+
+    def train_input(self, batch_size, use_pipeline=False):
+        if use_pipeline:
+            return ImageDataset.train_input(self, batch_size, use_pipeline)
+        return utils_input.EpochBatches(self.x_train, self.y_train, batch_size)
+
+
+class CIFARDataset(ImageDataset):
+    """CIFAR-10, with the uint8 training images of keras.datasets.cifar10."""
+
+    def __init__(self, x_train, y_train, x_test, y_test):
+        ImageDataset.__init__(self, "cifar", x_train, y_train, x_test, y_test, fgsm_eps=0.03)
+
+
+def load_mnist():
+    if not all(os.path.exists(path) for path in mnist_sources()):
+        from tensorflow.examples.tutorials.mnist import input_data
+        # Download images and labels into mnist.test (10K images+labels) and mnist.train (60K images+labels)
+        mnist = input_data.read_data_sets("data/mnist", one_hot=True, reshape=False, validation_size=0)
+        return MNISTDataset(mnist.train.images, mnist.train.labels, mnist.test.images, mnist.test.labels)
+    # the training set stays a view of the IDX files, converted one batch at a time;
+    # the test set is read whole by the evaluations, so it is converted once
+    arrays = utils_idx.read_mnist("data/mnist")
+    return MNISTDataset(arrays["x_train"], arrays["y_train"], np.asarray(arrays["x_test"]), np.asarray(arrays["y_test"]))
+
+
+def mnist_sources(folder="data/mnist"):
+    return sorted(utils_idx.mnist_files(folder).values())
+
+
+def mnist_mapped():
+    # unpacked IDX files are memory-mapped by load_mnist already
+    return utils_idx.unpacked(mnist_sources())
+
+
+def load_cifar():
+    import keras
+    from keras.datasets import cifar10
+    num_classes = 10
+    # https://github.com/BIGBALLON/cifar-10-cnn/blob/master/1_Lecun_Network/LeNet_keras.py
+    (x_train, y_train), (x_test, y_test) = cifar10.load_data()
+    y_train = keras.utils.to_categorical(y_train, num_classes)
+    y_test = keras.utils.to_categorical(y_test, num_classes)
+    # x_train stays uint8 (150 MB instead of 600 MB as float32), see utils_input.to_float
+    x_test = utils_input.to_float(x_test)
+    return CIFARDataset(x_train, y_train, x_test, y_test)
+
+
+def cifar_sources():
+    # where keras.datasets.cifar10 extracts the download
+    keras_home = os.environ.get("KERAS_HOME", os.path.join(os.path.expanduser("~"), ".keras"))
+    folder = os.path.join(keras_home, "datasets", "cifar-10-batches-py")
+    return [os.path.join(folder, "data_batch_" + str(i)) for i in range(1, 6)] + [os.path.join(folder, "test_batch")]
+
+
+loaders = {"mnist": load_mnist,
+           "cifar": load_cifar}
+
+sources = {"mnist": mnist_sources,
+           "cifar": cifar_sources}
+
+dataset_classes = {"mnist": MNISTDataset,
+                   "cifar": CIFARDataset}
+
+# loaders that map their source files themselves, which the cache would only copy
+mapped_sources = {"mnist": mnist_mapped}
+
+array_names = ["x_train", "y_train", "x_test", "y_test"]
+
+loaded = {}
+
+
+def load_cached(name):
+    if name in mapped_sources and mapped_sources[name]():
+        return loaders[name]()
+    dataset = None
+    if not all(os.path.exists(path) for path in sources[name]()):
+        # the loader downloads the missing files
+        dataset = loaders[name]()
+
+    def build():
+        built = dataset if dataset is not None else loaders[name]()
+        return dict((key, getattr(built, key)) for key in array_names)
+
+    arrays = utils_cache.cached_arrays(name, sources[name](), build)
+    return dataset_classes[name](*[arrays[key] for key in array_names])
+
+
+def load(name, cache=True):
+    if name not in loaded:
+        loaded[name] = load_cached(name) if cache else loaders[name]()
+    return loaded[name]
@@ -0,0 +1,350 @@
+import tensorflow as tf
+import numpy as np
+import utils_tf as utils
+
+# Network builders for the B_D experiments. Every network has a classifier
+# and a generator that reuses the classifier weights transposed; the GAN
+# ones also have a discriminator. classifier, generator and discriminator
+# all take is_training and reuse, and generator also takes the batch size
+# tensor used by the deconvolutions (ignored by the dense networks).
+
+
+# From tensorflow-generative-model-collections
+def lrelu(x, leak=0.2):
+    return tf.maximum(x, leak*x)
+
+
+class DenseNetwork(object):
+    """Fully connected classifier with a tied-weight generator.
+
+    hidden lists the hidden layer sizes, empty for no hidden layer. The
+    discriminator, used by the gan_nn_one_hidden scripts, has one hidden
+    layer of hidden[0] neurons.
+    """
+
+    uses_batch_size = False
+
+    def __init__(self, image_shape, num_classes, hidden, activation=tf.nn.sigmoid, xavier=False):
+        self.image_shape = list(image_shape)
+        self.image_size = int(np.prod(image_shape))
+        self.sizes = [self.image_size] + list(hidden) + [num_classes]
+        self.activation = activation
+        self.xavier = xavier
+
+        with tf.name_scope("classifier-generator"):
+            # Weights for classifier and generator
+            self.C_W = [self.weight_variable([n_in, n_out], name="C_W" + str(k+1))
+                        for k, (n_in, n_out) in enumerate(zip(self.sizes[:-1], self.sizes[1:]))]
+        self.C_W1 = self.C_W[0]
+
+    def weight_variable(self, shape, name):
+        if self.xavier:
+            return utils.weight_variable_xavier_initialized(shape, name=name)
+        return utils.weight_variable(shape, stddev=0.1, name=name)
+
+    def classifier(self, x, is_training=True, reuse=None):
+        with tf.variable_scope("classifier", reuse=reuse) as scope_c:
+            # Variables for classifier
+            C_B = [utils.bias_variable([size], name="C_B" + str(k+1)) for k, size in enumerate(self.sizes[1:])]
+
+            H = tf.reshape(x, [-1, self.image_size])
+            for W, B in zip(self.C_W[:-1], C_B[:-1]):
+                H = self.activation(tf.matmul(H, W) + B)
+            Ylogits = tf.matmul(H, self.C_W[-1]) + C_B[-1]
+
+            Ysigmoid = tf.nn.sigmoid(Ylogits)
+            Ysoftmax = tf.nn.softmax(Ylogits)
+
+            return Ysoftmax, Ysigmoid, Ylogits
+
+    def generator(self, y, bs=None, is_training=True, reuse=None):
+        with tf.variable_scope("generator", reuse=reuse) as scope_g:
+            # Variables for generator
+            G_B = [utils.bias_variable([size], name="G_B" + str(k+1)) for k, size in enumerate(self.sizes[:-1])]
+
+            # walks the classifier layers backwards with the transposed weights
+            GH = y
+            for W, B in reversed(list(zip(self.C_W[1:], G_B[1:]))):
+                GH = self.activation(tf.matmul(GH, tf.transpose(W)) + B)
+            GX = tf.matmul(GH, tf.transpose(self.C_W[0])) + G_B[0]
+            GXlogits = tf.reshape(GX, [-1] + self.image_shape)
+            GXsigmoid = tf.nn.sigmoid(GXlogits)
+
+            return GXsigmoid, GXlogits
+
+    def discriminator(self, x, is_training=True, reuse=None):
+        K = self.sizes[1]
+        with tf.variable_scope("discriminator", reuse=reuse) as scope:
+            # Variables for discriminator
+            D_W1 = utils.weight_variable_xavier_initialized([self.image_size, K], name="D_W1")
+            D_B1 = utils.bias_variable([K], name="D_B1")
+            D_W2 = utils.weight_variable_xavier_initialized([K, 1], name="D_W2")
+            D_B2 = utils.bias_variable([1], name="D_B2")
+
+            XX = tf.reshape(x, [-1, self.image_size])
+            H1 = tf.nn.relu(tf.matmul(XX, D_W1) + D_B1)
+            Ylogits = tf.matmul(H1, D_W2) + D_B2
+
+            Ysigmoid = tf.nn.sigmoid(Ylogits)
+            Ysoftmax = tf.nn.softmax(Ylogits)
+
+            return Ysoftmax, Ysigmoid, Ylogits
+
+
+class ConvNetwork(object):
+    """Three convolutional layers and a fully connected one (cnn_three_conv).
+
+    The generator runs the convolutions backwards with conv2d_transpose,
+    which needs the batch size as a tensor.
+    """
+
+    uses_batch_size = True
+
+    def __init__(self, image_shape, num_classes, K=4, L=8, M=12, N=200):
+        self.image_shape = list(image_shape)
+        self.K, self.L, self.M, self.N = K, L, M, N
+        size, channels = image_shape[0], image_shape[2]
+        # output sizes of the three convolutions (strides 1, 2 and 2)
+        self.size1, self.size2, self.size3 = size, size // 2, size // 4
+
+        with tf.name_scope("classifier-generator"):
+            self.C_W1 = utils.weight_variable([5, 5, channels, K], stddev=0.1, name="C_W1")
+            self.C_W2 = utils.weight_variable([5, 5, K, L], stddev=0.1, name="C_W2")
+            self.C_W3 = utils.weight_variable([4, 4, L, M], stddev=0.1, name="C_W3")
+
+            self.C_W4 = utils.weight_variable([self.size3 * self.size3 * M, N], stddev=0.1, name="C_W4")
+            self.C_W5 = utils.weight_variable([N, num_classes], stddev=0.1, name="C_W5")
+        self.num_classes = num_classes
+
+    def classifier(self, x, is_training=True, reuse=None):
+        K, L, M, N = self.K, self.L, self.M, self.N
+        with tf.variable_scope("classifier", reuse=reuse) as scope_c:
+            # Variables for classifier
+            C_B1 = utils.bias_variable([K], name="C_B1")
+            C_B2 = utils.bias_variable([L], name="C_B2")
+            C_B3 = utils.bias_variable([M], name="C_B3")
+            C_B4 = utils.bias_variable([N], name="C_B4")
+            C_B5 = utils.bias_variable([self.num_classes], name="C_B5")
+
+            stride = 1
+            H1 = tf.nn.relu(tf.nn.conv2d(x, self.C_W1, strides=[1, stride, stride, 1], padding='SAME') + C_B1)
+            stride = 2
+            H2 = tf.nn.relu(tf.nn.conv2d(H1, self.C_W2, strides=[1, stride, stride, 1], padding='SAME') + C_B2)
+            stride = 2
+            H3 = tf.nn.relu(tf.nn.conv2d(H2, self.C_W3, strides=[1, stride, stride, 1], padding='SAME') + C_B3)
+
+            # reshape the output from the third convolution for the fully connected layer
+            HH3 = tf.reshape(H3, shape=[-1, self.size3 * self.size3 * M])
+
+            H4 = tf.nn.relu(tf.matmul(HH3, self.C_W4) + C_B4)
+            Ylogits = tf.matmul(H4, self.C_W5) + C_B5
+
+            Ysigmoid = tf.nn.sigmoid(Ylogits)
+            Ysoftmax = tf.nn.softmax(Ylogits)
+
+            return Ysoftmax, Ysigmoid, Ylogits
+
+    def generator(self, y, bs, is_training=True, reuse=None):
+        K, L, M, N = self.K, self.L, self.M, self.N
+        with tf.variable_scope("generator", reuse=reuse) as scope_g:
+            # Variables for generator
+            G_B1 = utils.bias_variable([self.image_shape[2]], name="G_B1")
+            G_B2 = utils.bias_variable([K], name="G_B2")
+            G_B3 = utils.bias_variable([L], name="G_B3")
+            G_B4 = utils.bias_variable([M * self.size3 * self.size3], name="G_B4")
+            G_B5 = utils.bias_variable([N], name="G_B5")
+
+            GH4 = tf.nn.relu(tf.matmul(y, tf.transpose(self.C_W5)) + G_B5)
+            GH3 = tf.nn.relu(tf.matmul(GH4, tf.transpose(self.C_W4)) + G_B4)
+            GHH3 = tf.reshape(GH3, shape=[-1, self.size3, self.size3, M])
+            stride = 2
+            GH2 = tf.nn.relu(tf.nn.conv2d_transpose(GHH3, self.C_W3, output_shape=[bs, self.size2, self.size2, L], strides=[1, stride, stride, 1]) + G_B3)  #deconv2 W3
+            stride = 2
+            GH1 = tf.nn.relu(tf.nn.conv2d_transpose(GH2, self.C_W2, output_shape=[bs, self.size1, self.size1, K], strides=[1, stride, stride, 1]) + G_B2)  #deconv2 W2
+            stride = 1
+            GXlogits = tf.nn.conv2d_transpose(GH1, self.C_W1, output_shape=[bs] + self.image_shape, strides=[1, stride, stride, 1]) + G_B1  #deconv2 W1
+            GXsigmoid = tf.nn.sigmoid(GXlogits)
+
+            return GXsigmoid, GXlogits
+
+
+class GANConvNetwork(object):
+    """Two convolutional layers with batch norm and a fully connected one (gan_cnn_two_conv).
+
+    The generator takes random input and is trained against a
+    discriminator of the same shape as the classifier.
+    """
+
+    uses_batch_size = True
+
+    def __init__(self, image_shape, num_classes, K=64, L=128, M=1024):
+        self.image_shape = list(image_shape)
+        self.K, self.L, self.M = K, L, M
+        size, channels = image_shape[0], image_shape[2]
+        # output sizes of the two stride 2 convolutions
+        self.size1, self.size2 = size // 2, size // 4
+
+        with tf.name_scope("classifier-generator"):
+            # Weights for classifier and generator
+            self.C_W1 = utils.weight_variable([4, 4, channels, K], name="C_W1")
+            self.C_W2 = utils.weight_variable([4, 4, K, L], name="C_W2")
+
+            self.C_W3 = utils.weight_variable([self.size2 * self.size2 * L, M], name="C_W3")
+            self.C_W4 = utils.weight_variable([M, num_classes], name="C_W4")
+        self.num_classes = num_classes
+
+    def classifier(self, x, is_training=True, reuse=None):
+        K, L, M = self.K, self.L, self.M
+        with tf.variable_scope("classifier", reuse=reuse) as scope_c:
+            # Variables for classifier
+            C_B1 = utils.bias_variable([K], name="C_B1")
+            C_B2 = utils.bias_variable([L], name="C_B2")
+            C_B3 = utils.bias_variable([M], name="C_B3")
+            C_B4 = utils.bias_variable([self.num_classes], name="C_B4")
+
+            stride = 2
+            H1 = lrelu(tf.nn.conv2d(x, self.C_W1, strides=[1, stride, stride, 1], padding='SAME') + C_B1)
+            stride = 2
+            H2 = lrelu(utils.bn((tf.nn.conv2d(H1, self.C_W2, strides=[1, stride, stride, 1], padding='SAME') + C_B2), is_training=is_training, scope="C_bn_h2"))
+
+            # reshape the output from the second convolution for the fully connected layer
+            HH2 = tf.reshape(H2, shape=[-1, self.size2 * self.size2 * L])
+
+            H3 = tf.nn.relu(tf.matmul(HH2, self.C_W3) + C_B3)
+            Ylogits = tf.matmul(H3, self.C_W4) + C_B4
+
+            Ysigmoid = tf.nn.sigmoid(Ylogits)
+            Ysoftmax = tf.nn.softmax(Ylogits)
+
+            return Ysoftmax, Ysigmoid, Ylogits
+
+    def generator(self, z, bs, is_training=True, reuse=None):
+        K, L, M = self.K, self.L, self.M
+        with tf.variable_scope("generator", reuse=reuse) as scope_g:
+            # Variables for generator
+            G_B1 = utils.bias_variable([self.image_shape[2]], name="G_B1")
+            G_B2 = utils.bias_variable([K], name="G_B2")
+            G_B3 = utils.bias_variable([self.size2 * self.size2 * L], name="G_B3")
+            G_B4 = utils.bias_variable([M], name="G_B4")
+
+            GH3 = tf.nn.relu(utils.bn((tf.matmul(z, tf.transpose(self.C_W4)) + G_B4), is_training=is_training, scope="G_bn_gh3"))
+            GH2 = tf.nn.relu(utils.bn((tf.matmul(GH3, tf.transpose(self.C_W3)) + G_B3), is_training=is_training, scope="G_bn_gh2"))
+            GHH2 = tf.reshape(GH2, shape=[-1, self.size2, self.size2, L])
+            stride = 2
+            GH1 = tf.nn.relu(tf.nn.conv2d_transpose(GHH2, self.C_W2, output_shape=[bs, self.size1, self.size1, K], strides=[1, stride, stride, 1]) + G_B2)  #deconv2 W2
+            stride = 2
+            GXlogits = tf.nn.conv2d_transpose(GH1, self.C_W1, output_shape=[bs] + self.image_shape, strides=[1, stride, stride, 1]) + G_B1  #deconv2 W1
+            GXsigmoid = tf.nn.sigmoid(GXlogits)
+
+            return GXsigmoid, GXlogits
+
+    def discriminator(self, x, is_training=True, reuse=None):
+        K, L, M = self.K, self.L, self.M
+        channels = self.image_shape[2]
+        with tf.variable_scope("discriminator", reuse=reuse) as scope:
+            # Variables for discriminator
+            D_W1 = utils.weight_variable([4, 4, channels, K], name="D_W1")
+            D_B1 = utils.bias_variable([K], name="D_B1")
+            D_W2 = utils.weight_variable([4, 4, K, L], name="D_W2")
+            D_B2 = utils.bias_variable([L], name="D_B2")
+
+            D_W3 = utils.weight_variable([self.size2 * self.size2 * L, M], name="D_W3")
+            D_B3 = utils.bias_variable([M], name="D_B3")
+            D_W4 = utils.weight_variable([M, 1], name="D_W4")
+            D_B4 = utils.bias_variable([1], name="D_B4")
+
+            stride = 2
+            H1 = lrelu(tf.nn.conv2d(x, D_W1, strides=[1, stride, stride, 1], padding='SAME') + D_B1)
+            stride = 2
+            H2 = lrelu(utils.bn((tf.nn.conv2d(H1, D_W2, strides=[1, stride, stride, 1], padding='SAME') + D_B2), is_training=is_training, scope="D_bn_h2"))
+
+            # reshape the output from the second convolution for the fully connected layer
+            HH2 = tf.reshape(H2, shape=[-1, self.size2 * self.size2 * L])
+
+            H3 = lrelu(tf.matmul(HH2, D_W3) + D_B3)
+            Ylogits = tf.matmul(H3, D_W4) + D_B4
+
+            Ysigmoid = tf.nn.sigmoid(Ylogits)
+            Ysoftmax = tf.nn.softmax(Ylogits)
+
+            return Ysoftmax, Ysigmoid, Ylogits
+
+
+def constant_learning_rates(c_lr, g_lr=None):
+    return lambda dataset_name, config_num: (c_lr, g_lr if g_lr is not None else c_lr)
+
+
+def nn_two_hidden_learning_rates(dataset_name, config_num):
+    if dataset_name == "mnist" and config_num not in (0, 3):
+        return 0.05, 0.05
+    return 0.003, 0.003
+
+
+def nn_four_hidden_learning_rates(dataset_name, config_num):
+    if dataset_name == "mnist":
+        return (0.003 if config_num in (0, 3) else 0.03), 0.01
+    return 0.003, 0.003
+
+
+def cnn_three_conv_learning_rates(dataset_name, config_num):
+    # factors of the decayed learning rate
+    return 1., (10. if dataset_name == "mnist" else 1.)
+
+
+class Architecture(object):
+    """A network builder plus the training settings of the scripts it replaces.
+
+    learning_rates(dataset_name, config_num) returns the classifier and
+    generator learning rates (the discriminator uses the classifier one).
+    With lr_decay = (max, min, decay_speed) they are instead factors of a
+    learning rate that decays exponentially with the step and is fed
+    through a placeholder. hidden_grid maps a dataset name to the
+    (rows, cols) of the first hidden layer plot; datasets without an entry
+    get no plot. save_every is the default interval of resumable
+    checkpoints, None for none. unused_samples maps a dataset name to the
+    number of generator inputs the replaced script drew before training
+    and never used; they are still drawn so that the np.random stream
+    (batch order, generator input) stays the one of that script. The
+    TensorFlow op seeds do not, the graph having more ops.
+    """
+
+    def __init__(self, network, network_args=None, gan=False, num_steps=50001, checkpoint_every=500,
+                 learning_rates=constant_learning_rates(0.003), beta1=None, lr_decay=None, hidden_grid=None,
+                 save_every=None, unused_samples=None):
+        self.network = network
+        self.network_args = network_args or {}
+        self.gan = gan
+        self.num_steps = num_steps
+        self.checkpoint_every = checkpoint_every
+        self.learning_rates = learning_rates
+        self.beta1 = beta1
+        self.lr_decay = lr_decay
+        self.hidden_grid = hidden_grid or {}
+        self.save_every = save_every
+        self.unused_samples = unused_samples or {}
+
+    def build(self, image_shape, num_classes):
+        return self.network(image_shape, num_classes, **self.network_args)
+
+
+gan_settings = dict(gan=True, num_steps=500001, checkpoint_every=5000,
+                    learning_rates=constant_learning_rates(0.0002, 0.001), beta1=0.5, save_every=5000)
+
+architectures = {
+    "nn_no_hidden": Architecture(DenseNetwork, dict(hidden=[]),
+                                 hidden_grid={"mnist": (2, 5), "cifar": (2, 5)}),
+    "nn_one_hidden": Architecture(DenseNetwork, dict(hidden=[16]),
+                                  hidden_grid={"mnist": (4, 4), "cifar": (4, 4)}),
+    "nn_two_hidden": Architecture(DenseNetwork, dict(hidden=[16, 16]),
+                                  learning_rates=nn_two_hidden_learning_rates,
+                                  hidden_grid={"mnist": (4, 4), "cifar": (4, 4)}),
+    "nn_four_hidden": Architecture(DenseNetwork, dict(hidden=[200, 100, 60, 30]),
+                                   learning_rates=nn_four_hidden_learning_rates,
+                                   hidden_grid={"mnist": (10, 20), "cifar": (10, 20)}),
+    "cnn_three_conv": Architecture(ConvNetwork,
+                                   learning_rates=cnn_three_conv_learning_rates,
+                                   lr_decay=(0.003, 0.0001, 2000.0)),
+    "gan_nn_one_hidden": Architecture(DenseNetwork, dict(hidden=[128], activation=tf.nn.relu, xavier=True),
+                                      hidden_grid={"mnist": (8, 16)}, **gan_settings),
+    "gan_cnn_two_conv": Architecture(GANConvNetwork, unused_samples={"mnist": 15}, **gan_settings),
+}
@@ -0,0 +1,548 @@
+import tensorflow as tf
+import numpy as np
+import argparse
+import os
+import utils_tf as utils
+import utils_attack
+import utils_checkpoint
+import utils_eval
+import utils_metrics
+import utils_plot
+import utils_train
+import datasets
+import models
+from cleverhans.model import Model
+
+# Runs the B_D experiments: any architecture of models.architectures on any
+# dataset of datasets.loaders, for any entry of config_dict. Each dataset is
+# loaded once and each run builds its graph in a fresh tf.Graph, so a whole
+# sweep can run in one process:
+#   python runner.py --arch nn_one_hidden cnn_three_conv --dataset mnist cifar --config 0 1 2
+# The <dataset>_<arch>.py scripts are kept as shortcuts for a single run.
+
+config_dict = {0: "backprop", 1: "biprop", 2: "halfbiprop", 3: "nobias_backprop", 4: "nobias_biprop", 5: "nobias_halfbiprop"}
+
+batch_size = 100
+eval_batch_size = 1000
+
+
+def default_fgsm_curve(fgsm_eps):
+    # 0 to twice the dataset's FGSM epsilon in quarters of it
+    return [round(fgsm_eps * k / 4., 6) for k in range(9)]
+
+
+def sample_Z(m, n):
+    return np.random.uniform(-1., 1., size=[m, n])
+
+
+class ClassifierModel(Model):
+    def __init__(self, network):
+        self.network = network
+
+    def get_logits(self, x):
+        Ysoftmax, Ysigmoid, Ylogits = self.network.classifier(x, is_training=False, reuse=True)
+        return Ylogits
+
+
+class Experiment(object):
+    """One training run of an architecture on a dataset with one learning technique.
+
+    The graph and session are created in the constructor; run() trains,
+    writes the images, TensorBoard logs and CSV files under
+    out/, logs/ and csv/<model_name>, and closes the session.
+    session_config is an optional tf.ConfigProto, e.g. to bound the
+    number of threads when several runs share the machine.
+
+    Every save_every steps (default: the architecture's save_every, set for
+    the long GAN runs) the run is checkpointed under
+    checkpoints/<model_name>; with resume=True it continues from the
+    latest checkpoint and produces the same metrics as an uninterrupted
+    run (except with use_pipeline, whose shuffle order is not saved).
+
+    The checkpoint images are rendered in a background process unless
+    sync_plots is set (needed inside daemonic pool workers, e.g. sweep.py),
+    as NumPy mosaics unless figure_plots asks for the matplotlib figures.
+
+    fgsm_curve, a list of epsilons ([] for default_fgsm_curve), adds the
+    FGSM accuracy and max sigmoid/softmax at every epsilon to the CSV
+    metrics, from one input-gradient sign per test batch and checkpoint.
+    iterative_attack ("bim", or "pgd" for random starts) adds the accuracy
+    under attack_iters iterations at the dataset's FGSM epsilon, spending
+    at most about attack_budget seconds per checkpoint when it is set.
+    """
+
+    def __init__(self, arch_name, dataset, config_num, use_pipeline=False, fused_step=False, session_config=None,
+                 save_every=None, resume=False, sync_plots=False,
+                 figure_plots=False, fgsm_curve=None, iterative_attack=None, attack_iters=10, attack_budget=None):
+        self.arch = models.architectures[arch_name]
+        self.dataset = dataset
+        self.config_num = config_num
+        self.fused_step = fused_step
+        self.save_every = save_every if save_every is not None else self.arch.save_every
+        self.resume = resume
+        self.sync_plots = sync_plots
+        self.figure_plots = figure_plots
+        if fgsm_curve is not None and len(fgsm_curve) == 0:
+            fgsm_curve = default_fgsm_curve(dataset.fgsm_eps)
+        self.fgsm_curve = fgsm_curve
+        self.iterative_attack = iterative_attack
+        self.attack_iters = attack_iters
+        self.attack_budget = attack_budget
+        self.model_name = model_name(dataset.name, arch_name, config_num)
+        print("Model name: " + self.model_name)
+
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            # for reproducibility
+            np.random.seed(0)
+            tf.set_random_seed(0)
+            self.sess = tf.Session(config=session_config)
+            self.train_input = dataset.train_input(batch_size, use_pipeline)
+            self.build()
+
+    def build(self):
+        arch, dataset, config_num = self.arch, self.dataset, self.config_num
+        shape = [None] + dataset.image_shape
+        num_classes = dataset.num_classes
+        train_input = self.train_input
+
+        with tf.name_scope("input"):
+            # input X & output GX_: images, the first dimension (None) will index the images in the mini-batch
+            self.X = train_input.images_placeholder(shape)
+            self.X_noisy = tf.placeholder(tf.float32, shape)
+            self.X_adv = tf.placeholder(tf.float32, shape)
+
+            if not arch.gan:
+                self.GX_ = train_input.images_placeholder(shape)
+
+            # output Y_ & input GY: labels for classification and generation
+            self.Y_ = train_input.labels_placeholder([None, num_classes])
+            if not arch.gan:
+                self.GY = train_input.labels_placeholder([None, num_classes])
+
+            # variable learning rate
+            self.lr = tf.placeholder(tf.float32) if arch.lr_decay else None
+
+            # variable batch size
+            self.BS = tf.placeholder(tf.int32) if arch.network.uses_batch_size else None
+
+            if arch.gan:
+                # random input for Generator
+                self.Z = tf.placeholder(tf.float32, shape=[None, num_classes])
+                if self.fused_step:
+                    # random input for the generator update of a fused training step
+                    self.Z_g = tf.placeholder(tf.float32, shape=[None, num_classes])
+
+            input_test_sum = tf.summary.image("input", self.X, num_classes)
+            input_noisy_sum = tf.summary.image("input-noisy", self.X_noisy, num_classes)
+            input_adv_sum = tf.summary.image("input-adv", self.X_adv, num_classes)
+
+        self.network = network = arch.build(dataset.image_shape, num_classes)
+        generator_input = self.Z if arch.gan else self.GY
+
+        self.GXsigmoid, GXlogits = network.generator(generator_input, self.BS)
+        self.GXsigmoid_test, GXlogits_test = network.generator(generator_input, self.BS, is_training=False, reuse=True)
+
+        Ysoftmax, Ysigmoid, Ylogits = network.classifier(self.X)
+        self.model_classifier = ClassifierModel(network)
+
+        # the test set is evaluated in inference mode (batch norm with the moving statistics), so
+        # the batched numbers do not depend on the batch size
+        Ysoftmax_test, Ysigmoid_test, Ylogits_test = network.classifier(self.X, is_training=False, reuse=True)
+
+        Ysoftmax_noisy, Ysigmoid_noisy, Ylogits_noisy = network.classifier(self.X_noisy, is_training=False, reuse=True)
+        Ysoftmax_adv, Ysigmoid_adv, Ylogits_adv = network.classifier(self.X_adv, is_training=False, reuse=True)
+
+        if arch.gan:
+            Ysoftmax_real, Ysigmoid_real, Ylogits_real = network.discriminator(self.X)
+            Ysoftmax_fake, Ysigmoid_fake, Ylogits_fake = network.discriminator(self.GXsigmoid, reuse=True)
+
+        with tf.name_scope("loss"):
+            self.c_loss = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits(logits=Ylogits, labels=self.Y_))
+            self.c_loss_test = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits(logits=Ylogits_test, labels=self.Y_))
+
+            if arch.gan:
+                d_loss_real = tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=Ylogits_real, labels=tf.ones_like(Ylogits_real)))
+                d_loss_fake = tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=Ylogits_fake, labels=tf.zeros_like(Ylogits_fake)))
+                self.d_loss = d_loss_real + d_loss_fake
+
+                self.g_loss = tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=Ylogits_fake, labels=tf.ones_like(Ylogits_fake)))
+            else:
+                self.g_loss = tf.reduce_mean(
+                    tf.nn.sigmoid_cross_entropy_with_logits(logits=GXlogits, labels=self.GX_))
+
+            """ Summary """
+            if arch.gan:
+                d_loss_real_sum = tf.summary.scalar("d_loss_real", d_loss_real)
+                d_loss_fake_sum = tf.summary.scalar("d_loss_fake", d_loss_fake)
+                d_loss_sum = tf.summary.scalar("d_loss", self.d_loss)
+            g_loss_sum = tf.summary.scalar("g_loss", self.g_loss)
+            c_loss_sum = tf.summary.scalar("c_loss", self.c_loss_test)
+
+        # accuracy of the trained model, between 0 (worst) and 1 (best)
+        with tf.name_scope("accuracy"):
+            with tf.name_scope("correct_prediction"):
+                correct_prediction = tf.equal(tf.argmax(Ysoftmax_test, 1), tf.argmax(self.Y_, 1))
+            with tf.name_scope("accuracy"):
+                self.accuracy = tf.reduce_mean(tf.cast(correct_prediction, tf.float32))
+            with tf.name_scope("correct_prediction_noisy"):
+                correct_prediction_noisy = tf.equal(tf.argmax(Ysoftmax_noisy, 1), tf.argmax(self.Y_, 1))
+            with tf.name_scope("accuracy_noisy"):
+                self.accuracy_noisy = tf.reduce_mean(tf.cast(correct_prediction_noisy, tf.float32))
+            with tf.name_scope("correct_prediction_adv"):
+                correct_prediction_adv = tf.equal(tf.argmax(Ysoftmax_adv, 1), tf.argmax(self.Y_, 1))
+            with tf.name_scope("accuracy_adv"):
+                self.accuracy_adv = tf.reduce_mean(tf.cast(correct_prediction_adv, tf.float32))
+
+            """ Summary """
+            accuracy_sum = tf.summary.scalar("accuracy", self.accuracy)
+            accuracy_noisy_sum = tf.summary.scalar("accuracy_noisy", self.accuracy_noisy)
+            accuracy_adv_sum = tf.summary.scalar("accuracy_adv", self.accuracy_adv)
+
+        with tf.name_scope("max_output"):
+            with tf.name_scope("max_output_test"):
+                self.max_output_sigmoid_test = tf.reduce_max(Ysigmoid_test)
+                self.max_output_softmax_test = tf.reduce_max(Ysoftmax_test)
+            with tf.name_scope("max_output_noise"):
+                self.max_output_sigmoid_noise = tf.reduce_max(Ysigmoid_noisy)
+                self.max_output_softmax_noise = tf.reduce_max(Ysoftmax_noisy)
+            with tf.name_scope("max_output_adv"):
+                self.max_output_sigmoid_adv = tf.reduce_max(Ysigmoid_adv)
+                self.max_output_softmax_adv = tf.reduce_max(Ysoftmax_adv)
+
+            """ Summary """
+            max_output_sigmoid_test_sum = tf.summary.scalar("max_output_sigmoid_test", self.max_output_sigmoid_test)
+            max_output_softmax_test_sum = tf.summary.scalar("max_output_softmax_test", self.max_output_softmax_test)
+            max_output_sigmoid_noise_sum = tf.summary.scalar("max_output_sigmoid_noise", self.max_output_sigmoid_noise)
+            max_output_softmax_noise_sum = tf.summary.scalar("max_output_softmax_noise", self.max_output_softmax_noise)
+            max_output_sigmoid_adv_sum = tf.summary.scalar("max_output_sigmoid_adv", self.max_output_sigmoid_adv)
+            max_output_softmax_adv_sum = tf.summary.scalar("max_output_softmax_adv", self.max_output_softmax_adv)
+
+        utils.show_all_variables()
+        t_vars = tf.trainable_variables()
+        d_vars = [var for var in t_vars if 'D_' in var.name]
+        c_vars = [var for var in t_vars if 'C_' in var.name]\
+            if config_num < 3 else [var for var in t_vars if 'C_W' in var.name]
+        g_vars = [var for var in t_vars if 'C_W' in var.name or 'G_' in var.name]\
+            if config_num < 3 else c_vars
+
+        # training step
+        learning_rate_dis, learning_rate_gen = arch.learning_rates(dataset.name, config_num)
+        if arch.lr_decay:
+            learning_rate_dis, learning_rate_gen = learning_rate_dis*self.lr, learning_rate_gen*self.lr
+
+        def d_loss_after_update(read):
+            # discriminator loss rebuilt for the fused training step, on the weights read after the classifier update
+            fused = utils_train.with_reads(network, read)
+            with utils_train.reading_variables(read):
+                GXsigmoid_fused, GXlogits_fused = fused.generator(self.Z, self.BS, reuse=True)
+                Ysoftmax_real_fused, Ysigmoid_real_fused, Ylogits_real_fused = fused.discriminator(self.X, reuse=True)
+                Ysoftmax_fake_fused, Ysigmoid_fake_fused, Ylogits_fake_fused = fused.discriminator(GXsigmoid_fused, reuse=True)
+            return tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=Ylogits_real_fused, labels=tf.ones_like(Ylogits_real_fused)))\
+                + tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=Ylogits_fake_fused, labels=tf.zeros_like(Ylogits_fake_fused)))
+
+        def g_loss_after_update(read):
+            # generator loss rebuilt for the fused training step (with its own random input for GANs)
+            fused = utils_train.with_reads(network, read)
+            with utils_train.reading_variables(read):
+                if arch.gan:
+                    GXsigmoid_fused, GXlogits_fused = fused.generator(self.Z_g, self.BS, reuse=True)
+                    Ysoftmax_fake_fused, Ysigmoid_fake_fused, Ylogits_fake_fused = fused.discriminator(GXsigmoid_fused, reuse=True)
+                    return tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=Ylogits_fake_fused, labels=tf.ones_like(Ylogits_fake_fused)))
+                GXsigmoid_fused, GXlogits_fused = fused.generator(self.GY, self.BS, reuse=True)
+            return tf.reduce_mean(tf.nn.sigmoid_cross_entropy_with_logits(logits=GXlogits_fused, labels=self.GX_))
+
+        with tf.name_scope("train"):
+            c_optimizer = self.optimizer(learning_rate_dis)
+            g_optimizer = self.optimizer(learning_rate_gen)
+            if arch.gan:
+                d_optimizer = self.optimizer(learning_rate_dis)
+            if self.fused_step:
+                # every update of a step in one sess.run, in the same order as the separate calls
+                steps = [(c_optimizer, lambda read: self.c_loss, c_vars)]
+                if arch.gan:
+                    steps.append((d_optimizer, d_loss_after_update, d_vars))
+                steps.append((g_optimizer, g_loss_after_update, g_vars))
+                train_ops = utils_train.sequential_minimize(steps)
+                self.c_train, self.fused_train = train_ops[0], train_ops[-1]
+            else:
+                self.c_train = c_optimizer.minimize(self.c_loss, var_list=c_vars)
+                if arch.gan:
+                    self.d_train = d_optimizer.minimize(self.d_loss, var_list=d_vars)
+                self.g_train = g_optimizer.minimize(self.g_loss, var_list=g_vars)
+
+        # final summary operations
+        if arch.gan:
+            self.g_sum = tf.summary.merge([d_loss_fake_sum, g_loss_sum])
+            self.d_sum = tf.summary.merge([d_loss_real_sum, d_loss_sum])
+        else:
+            self.g_sum = tf.summary.merge([g_loss_sum])
+        self.c_sum = tf.summary.merge([input_test_sum, accuracy_sum, c_loss_sum, max_output_sigmoid_test_sum, max_output_softmax_test_sum])
+        self.noise_sum = tf.summary.merge([max_output_sigmoid_noise_sum, max_output_softmax_noise_sum])
+        self.noisy_sum = tf.summary.merge([input_noisy_sum, accuracy_noisy_sum])
+        self.adv_sum = tf.summary.merge([input_adv_sum, accuracy_adv_sum, max_output_sigmoid_adv_sum, max_output_softmax_adv_sum])
+
+        fgsm_params = {'eps': dataset.fgsm_eps,
+                       'clip_min': 0.,
+                       'clip_max': 1.}
+        self.fgsm_eval = utils_attack.FGSMEvaluator(self.model_classifier, self.sess, self.X_adv.get_shape(), fgsm_params)
+        if self.fgsm_curve is not None:
+            self.fgsm_curve_eval = utils_attack.FGSMCurveEvaluator(self.model_classifier, self.sess, self.X_adv.get_shape(),
+                                                                   self.fgsm_curve, fgsm_params['clip_min'], fgsm_params['clip_max'])
+        if self.iterative_attack is not None:
+            # step size of Madry et al.: 2.5 * eps / iterations
+            self.iterative_eval = utils_attack.IterativeAttackEvaluator(self.model_classifier, self.sess, self.X_adv.get_shape(),
+                                                                        dataset.fgsm_eps, 2.5 * dataset.fgsm_eps / self.attack_iters,
+                                                                        self.attack_iters, rand_init=self.iterative_attack == "pgd",
+                                                                        clip_min=fgsm_params['clip_min'], clip_max=fgsm_params['clip_max'],
+                                                                        batch_size=eval_batch_size)
+
+        self.eval_test = utils_eval.BatchedEvaluator(self.sess, self.X, self.Y_, correct_prediction, accuracy=self.accuracy, loss=self.c_loss_test,
+                                                     max_sigmoid=self.max_output_sigmoid_test, max_softmax=self.max_output_softmax_test, batch_size=eval_batch_size)
+        self.eval_noisy = utils_eval.BatchedEvaluator(self.sess, self.X_noisy, self.Y_, correct_prediction_noisy, accuracy=self.accuracy_noisy,
+                                                      max_sigmoid=self.max_output_sigmoid_noise, max_softmax=self.max_output_softmax_noise, batch_size=eval_batch_size)
+        self.eval_adv = utils_eval.BatchedEvaluator(self.sess, self.X_adv, self.Y_, correct_prediction_adv, accuracy=self.accuracy_adv,
+                                                    max_sigmoid=self.max_output_sigmoid_adv, max_softmax=self.max_output_softmax_adv, batch_size=eval_batch_size)
+
+    def optimizer(self, learning_rate):
+        if self.arch.beta1 is not None:
+            return tf.train.AdamOptimizer(learning_rate, beta1=self.arch.beta1)
+        return tf.train.AdamOptimizer(learning_rate)
+
+    def feed(self, feed_dict, bs=None, learning_rate=None):
+        # adds the batch size and learning rate for the networks that take them
+        feed_dict = dict(feed_dict)
+        if self.BS is not None and bs is not None:
+            feed_dict[self.BS] = bs
+        if self.lr is not None and learning_rate is not None:
+            feed_dict[self.lr] = learning_rate
+        return self.train_input.feed(feed_dict)
+
+    def run(self):
+        arch, dataset, sess = self.arch, self.dataset, self.sess
+        num_classes = dataset.num_classes
+        num_steps = arch.num_steps
+        last_step = num_steps - 1
+        half_steps = num_steps // 2
+        hidden_grid = arch.hidden_grid.get(dataset.name)
+        if arch.gan:
+            num_samples, samples_grid = 25, (5, 5)
+        else:
+            num_samples, samples_grid = num_classes, (2, 5) if num_classes == 10 else (10, 10)
+
+        folder_out = 'out/' + self.model_name + '/'
+        if not os.path.exists(folder_out):
+            os.makedirs(folder_out)
+
+        folder_csv = 'csv/' + self.model_name + '/'
+        if not os.path.exists(folder_csv):
+            os.makedirs(folder_csv)
+
+        folder_logs = 'logs/' + self.model_name
+        if not os.path.exists(folder_logs):
+            os.makedirs(folder_logs)
+
+        writer = tf.summary.FileWriter(folder_logs, self.graph)
+        plots = utils_plot.plot_writer(background=not self.sync_plots, renderer="figure" if self.figure_plots else "mosaic")
+
+        all_classes = np.eye(num_classes)
+        counter = 0
+
+        random_noise = np.random.random_sample(dataset.x_test.shape)
+        test_image_with_noise = np.clip(dataset.x_test + 0.1*random_noise, 0., 1.).astype(np.float32)
+        random_noise = random_noise.astype(np.float32)
+        unused_samples = arch.unused_samples.get(dataset.name)
+        if unused_samples:
+            # sample_Z_test of the replaced script, drawn only to keep the random stream
+            sample_Z(unused_samples, num_classes)
+
+        accuracy_list = []
+        sigmoid_list = []
+        softmax_list = []
+        attack_lists = {}
+        if self.fgsm_curve is not None:
+            attack_lists["fgsm_curve"] = []
+        if self.iterative_attack is not None:
+            attack_lists["iterative_attack"] = []
+
+        with self.graph.as_default():
+            # initialize all variables
+            sess.run(tf.global_variables_initializer())
+            if self.save_every or self.resume:
+                # the random starts of PGD have their own RandomState
+                rngs = {"iterative_attack": self.iterative_eval.rng} if self.iterative_attack is not None else {}
+                checkpoint = utils_checkpoint.RunCheckpoint('checkpoints/' + self.model_name, rngs=rngs)
+        self.train_input.start(sess)
+
+        start_step = 0
+        if self.resume:
+            state = checkpoint.restore(sess)
+            if state is not None:
+                start_step, counter = state["step"], state["counter"]
+                accuracy_list, sigmoid_list, softmax_list = state["accuracy"], state["sigmoid"], state["softmax"]
+                attack_lists.update((name, rows) for name, rows in state.get("attacks", {}).items() if name in attack_lists)
+                self.train_input.set_state(state["input"])
+                print("Resumed from step " + str(start_step))
+        metrics = utils_metrics.MetricsWriter(folder_csv, (accuracy_list, sigmoid_list, softmax_list),
+                                              attack_lists)
+
+        for i in range(start_step, num_steps):
+            batch_X, batch_Y = self.train_input.next_batch()
+
+            learning_rate = None
+            if arch.lr_decay:
+                # learning rate decay
+                max_learning_rate, min_learning_rate, decay_speed = arch.lr_decay
+                learning_rate = min_learning_rate + (max_learning_rate - min_learning_rate) * np.exp(-i/decay_speed)
+
+            if i % arch.checkpoint_every == 0 or i == last_step:
+                counter += 1
+                # Saves generated images
+                if arch.gan:
+                    samples = sess.run(self.GXsigmoid_test, self.feed({self.Z: sample_Z(num_samples, num_classes)}, bs=num_samples))
+                else:
+                    samples = sess.run(self.GXsigmoid_test, self.feed({self.GY: all_classes}, bs=num_classes))
+                plots.generator(samples, dataset.image_shape, samples_grid, folder_out+"gen_"+str(i).zfill(6)+'.png')
+
+                if hidden_grid is not None:
+                    plots.first_hidden(sess.run(self.network.C_W1), dataset.image_shape, hidden_grid,
+                                       folder_out+"hidden_"+str(i).zfill(6)+'.png')
+
+                accu_adv, sigmoid_adv, softmax_adv, sum_adv = self.eval_adv.run([self.accuracy_adv, self.max_output_sigmoid_adv, self.max_output_softmax_adv, self.adv_sum], dataset.x_test, dataset.y_test, transform=self.fgsm_eval.generate_np)
+                adv_x_np = self.eval_adv.first_batch
+                plots.generator(adv_x_np[:num_samples], dataset.image_shape, samples_grid, folder_out+"adv_"+str(i).zfill(6)+'.png')
+
+                accu_test, c_loss_test, sigmoid_test, softmax_test, sum_c = self.eval_test.run([self.accuracy, self.c_loss_test, self.max_output_sigmoid_test, self.max_output_softmax_test, self.c_sum], dataset.x_test, dataset.y_test)
+                writer.add_summary(sum_c, i)
+                if arch.gan:
+                    d_loss_test, sum_d = sess.run([self.d_loss, self.d_sum], self.feed({self.X: batch_X, self.Z: sample_Z(batch_size, num_classes)}, bs=batch_size))
+                    writer.add_summary(sum_d, i)
+                    g_loss_test, sum_g = sess.run([self.g_loss, self.g_sum], self.feed({self.Z: sample_Z(batch_size, num_classes)}, bs=batch_size))
+                else:
+                    g_loss_test, sum_g = sess.run([self.g_loss, self.g_sum], self.feed({self.GY: batch_Y, self.GX_: batch_X}, bs=batch_size))
+                writer.add_summary(sum_g, i)
+
+                print(str(i) + ": epoch " + str(i*batch_size//dataset.x_train.shape[0]+1)\
+                    + " - test loss class: " + str(c_loss_test) + " test loss gen: " + str(g_loss_test)
+                    + (" test loss dis: " + str(d_loss_test) if arch.gan else ""))
+                print("Real test images     - Sigmoid: " + str(sigmoid_test) + "\tSoftmax: " + str(softmax_test) + "\taccuracy: "+ str(accu_test))
+
+                sigmoid_random, softmax_random, sum_random = self.eval_noisy.run([self.max_output_sigmoid_noise, self.max_output_softmax_noise, self.noise_sum], random_noise)
+                writer.add_summary(sum_random, i)
+                accu_random, sum_noisy = self.eval_noisy.run([self.accuracy_noisy, self.noisy_sum], test_image_with_noise, dataset.y_test)
+                writer.add_summary(sum_noisy, i)
+                print("Random noise images  - Sigmoid: " + str(sigmoid_random) + "\tSoftmax: " + str(softmax_random) + "\taccuracy: "+ str(accu_random))
+
+                writer.add_summary(sum_adv, i)
+                print("Adversarial examples - Sigmoid: " + str(sigmoid_adv) + "\tSoftmax: " + str(softmax_adv) + "\taccuracy: "+ str(accu_adv))
+                attack_rows = dict((name, []) for name in attack_lists)
+                if self.fgsm_curve is not None:
+                    for eps, accu_eps, sigmoid_eps, softmax_eps in self.fgsm_curve_eval.evaluate(self.eval_adv, dataset.x_test, dataset.y_test):
+                        print("FGSM eps=" + str(eps) + "\t     - Sigmoid: " + str(sigmoid_eps) + "\tSoftmax: " + str(softmax_eps) + "\taccuracy: " + str(accu_eps))
+                        attack_rows["fgsm_curve"].append([i, eps, accu_eps, sigmoid_eps, softmax_eps, counter])
+                if self.iterative_attack is not None:
+                    accu_it, sigmoid_it, softmax_it, evaluated, passes = self.iterative_eval.evaluate(dataset.x_test, dataset.y_test, self.attack_budget)
+                    print(self.iterative_attack.upper() + " (" + str(evaluated) + " images) - Sigmoid: " + str(sigmoid_it) + "\tSoftmax: " + str(softmax_it)
+                          + "\taccuracy: " + str(accu_it) + "\t(%.1f forward passes per image)" % passes)
+                    attack_rows["iterative_attack"].append([i, dataset.fgsm_eps, accu_it, sigmoid_it, softmax_it, evaluated, passes, counter])
+                for name in attack_rows:
+                    attack_lists[name].extend(attack_rows[name])
+                print()
+                accuracy_list.append([i, accu_test, accu_random, accu_adv, counter])
+                sigmoid_list.append([i, sigmoid_test, sigmoid_random, sigmoid_adv, counter])
+                softmax_list.append([i, softmax_test, softmax_random, softmax_adv, counter])
+                metrics.append(accuracy_list[-1], sigmoid_list[-1], softmax_list[-1], attack_rows)
+
+            self.train_step(i, batch_X, batch_Y, learning_rate, i < half_steps)
+
+            if self.save_every and (i+1) % self.save_every == 0 and i < last_step:
+                checkpoint.save(sess, i+1, {"counter": counter, "accuracy": accuracy_list, "sigmoid": sigmoid_list,
+                                            "softmax": softmax_list, "attacks": attack_lists,
+                                            "input": self.train_input.get_state()})
+
+        writer.close()
+        sess.close()
+        metrics.close()
+        render_time, blocked_time = plots.close()
+        print(metrics.summary())
+        print("Plots: %.1fs of rendering, %.1fs on the training thread (%.1fs saved)"
+              % (render_time, blocked_time, render_time - blocked_time))
+
+    def train_step(self, i, batch_X, batch_Y, learning_rate, first_half):
+        config_num, sess = self.config_num, self.sess
+        generator_step = config_num == 1 or (config_num == 2 and first_half) or\
+            config_num == 4 or (config_num == 5 and first_half)
+        if self.arch.gan:
+            num_classes = self.dataset.num_classes
+            if self.fused_step and generator_step:
+                sess.run(self.fused_train, self.feed({self.X: batch_X, self.Y_: batch_Y, self.Z: sample_Z(batch_size, num_classes), self.Z_g: sample_Z(batch_size, num_classes)}, bs=batch_size))
+            else:
+                sess.run(self.c_train, self.feed({self.X: batch_X, self.Y_: batch_Y}))
+                if generator_step:
+                    sess.run(self.d_train, self.feed({self.X: batch_X, self.Z: sample_Z(batch_size, num_classes)}, bs=batch_size))
+                    sess.run(self.g_train, self.feed({self.Z: sample_Z(batch_size, num_classes)}, bs=batch_size))
+        else:
+            if self.fused_step and generator_step:
+                sess.run(self.fused_train, self.feed({self.X: batch_X, self.Y_: batch_Y, self.GY: batch_Y, self.GX_: batch_X}, bs=batch_size, learning_rate=learning_rate))
+            else:
+                sess.run(self.c_train, self.feed({self.X: batch_X, self.Y_: batch_Y}, learning_rate=learning_rate))
+                if generator_step:
+                    sess.run(self.g_train, self.feed({self.GY: batch_Y, self.GX_: batch_X}, bs=batch_size, learning_rate=learning_rate))
+
+
+def model_name(dataset_name, arch_name, config_num):
+    return dataset_name + "_" + arch_name + "_" + config_dict[config_num]
+
+
+def run_all(arch_names, dataset_names, config_nums, cache=True, **options):
+    # Every dataset is loaded once (memory-mapped from data/cache with cache) and shared by all of its runs;
+    # options go to Experiment
+    for dataset_name in dataset_names:
+        dataset = datasets.load(dataset_name, cache)
+        for arch_name in arch_names:
+            for config_num in config_nums:
+                Experiment(arch_name, dataset, config_num, **options).run()
+
+
+def run_script(dataset_name, arch_name, argv):
+    # Command line of the old per-architecture scripts:
+    # <config_num> [--pipeline] [--fused] [--resume] [--sync-plots] [--figure-plots] [--fgsm-curve] [--bim | --pgd] [--no-cache]
+    config_num = int(argv[0]) if len(argv) > 0 else 1  # Choose type of learning technique according to config_dict
+    run_all([arch_name], [dataset_name], [config_num], cache="--no-cache" not in argv[1:],
+            use_pipeline="--pipeline" in argv[1:], fused_step="--fused" in argv[1:], resume="--resume" in argv[1:],
+            sync_plots="--sync-plots" in argv[1:], figure_plots="--figure-plots" in argv[1:],
+            fgsm_curve=[] if "--fgsm-curve" in argv[1:] else None,
+            iterative_attack="pgd" if "--pgd" in argv[1:] else "bim" if "--bim" in argv[1:] else None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trains B_D architectures for several datasets and learning techniques in one process.")
+    parser.add_argument("--arch", nargs="+", required=True, choices=sorted(models.architectures))
+    parser.add_argument("--dataset", nargs="+", default=["mnist"], choices=sorted(datasets.loaders))
+    parser.add_argument("--config", nargs="+", type=int, default=[1], choices=sorted(config_dict),
+                        help="entries of config_dict: " + str(config_dict))
+    parser.add_argument("--pipeline", action="store_true", help="tf.data input pipeline instead of feed_dict batches")
+    parser.add_argument("--fused", action="store_true", help="run all train ops of a step in a single sess.run")
+    parser.add_argument("--save-every", type=int, default=None, help="checkpoint interval in steps, 0 for none (default: per architecture)")
+    parser.add_argument("--resume", action="store_true", help="continue from the latest checkpoint of each run")
+    parser.add_argument("--sync-plots", action="store_true", help="render the checkpoint images on the training thread")
+    parser.add_argument("--figure-plots", action="store_true", help="one matplotlib subplot per image instead of a NumPy mosaic")
+    parser.add_argument("--fgsm-curve", nargs="*", type=float, default=None, metavar="EPS",
+                        help="FGSM accuracy at these epsilons in csv/<run>/fgsm_curve.csv (none given: 0 to twice the dataset's)")
+    parser.add_argument("--iterative-attack", choices=["bim", "pgd"], default=None,
+                        help="accuracy under an iterative attack at the dataset's FGSM epsilon, in csv/<run>/iterative_attack.csv")
+    parser.add_argument("--attack-iters", type=int, default=10, help="iterations of --iterative-attack")
+    parser.add_argument("--attack-budget", type=float, default=None,
+                        help="seconds of --iterative-attack per checkpoint; later test batches are skipped")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="load the dataset in this process instead of mapping the shared cache in data/cache")
+    args = parser.parse_args(argv)
+    print("Tensorflow version " + tf.__version__)
+    run_all(args.arch, args.dataset, args.config, cache=not args.no_cache, use_pipeline=args.pipeline, fused_step=args.fused,
+            save_every=args.save_every, resume=args.resume, sync_plots=args.sync_plots,
+            figure_plots=args.figure_plots, fgsm_curve=args.fgsm_curve, iterative_attack=args.iterative_attack,
+            attack_iters=args.attack_iters, attack_budget=args.attack_budget)
+
+
+if __name__ == "__main__":
+    main()
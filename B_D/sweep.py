@@ -0,0 +1,160 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import time
+import traceback
+
+# Runs a sweep of B_D experiments in parallel, one run per task of a process
+# pool, and collects the accuracy/sigmoid/softmax CSV files of every run into
+# one table:
+#   python sweep.py --arch nn_one_hidden cnn_three_conv --dataset mnist --config 0 1 2 3 4 5
+#   python sweep.py mnist_nn_one_hidden.py cifar_nn_one_hidden --config 1 2
+# Workers are spawned fresh and limited to their share of the cores before
+# they import TensorFlow, so that the runs do not oversubscribe the machine.
+
+all_configs = [0, 1, 2, 3, 4, 5]
+
+# keys of models.architectures and datasets.loaders, listed here because
+# both modules import TensorFlow, which only the workers load
+arch_names = ["nn_no_hidden", "nn_one_hidden", "nn_two_hidden", "nn_four_hidden", "cnn_three_conv",
+              "gan_nn_one_hidden", "gan_cnn_two_conv"]
+dataset_names = ["mnist", "cifar"]
+
+# columns of the accuracy, sigmoid and softmax CSV files after the step
+metric_columns = ["test", "noisy", "adv"]
+
+
+def parse_script(name, arch_names, dataset_names):
+    # "mnist_nn_one_hidden.py" -> ("mnist", "nn_one_hidden")
+    name = os.path.basename(name).replace(".py", "")
+    for dataset_name in dataset_names:
+        arch_name = name[len(dataset_name) + 1:]
+        if name.startswith(dataset_name + "_") and arch_name in arch_names:
+            return dataset_name, arch_name
+    raise ValueError("not a B_D experiment script: " + name)
+
+
+def init_worker(threads, core_sets, started):
+    # Runs in every worker before TensorFlow is imported. A worker that replaces
+    # a dead one takes the next core set in turn instead of waiting for a free one
+    for var in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]:
+        os.environ[var] = str(threads)
+    with started.get_lock():
+        index = started.value
+        started.value += 1
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, core_sets[index % len(core_sets)])
+
+
+def run_task(task):
+    dataset_name, arch_name, config_num, threads, cache, options = task
+    import tensorflow as tf
+    import datasets
+    import runner
+    name = runner.model_name(dataset_name, arch_name, config_num)
+    start = time.time()
+    try:
+        session_config = tf.ConfigProto(intra_op_parallelism_threads=threads,
+                                        inter_op_parallelism_threads=1)
+        runner.Experiment(arch_name, datasets.load(dataset_name, cache), config_num,
+                          session_config=session_config, **options).run()
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return name, dataset_name, arch_name, config_num, time.time() - start, error
+
+
+def read_csv(filename):
+    with open(filename) as f:
+        return [row for row in csv.reader(f) if row]
+
+
+def collect_results(runs, filename):
+    # One row per checkpoint of every run, joined on the checkpoint step
+    header = ["model_name", "dataset", "arch", "config", "step", "counter"]
+    for kind in ["accuracy", "sigmoid", "softmax"]:
+        header += [kind + "_" + column for column in metric_columns]
+
+    rows = []
+    for name, dataset_name, arch_name, config_num in runs:
+        folder_csv = 'csv/' + name + '/'
+        try:
+            tables = [read_csv(folder_csv + kind + ".csv") for kind in ["accuracy", "sigmoid", "softmax"]]
+        except IOError:
+            print("No results for " + name)
+            continue
+        for accu_row, sigmoid_row, softmax_row in zip(*tables):
+            step, counter = accu_row[0], accu_row[4]
+            rows.append([name, dataset_name, arch_name, config_num, step, counter]
+                        + accu_row[1:4] + sigmoid_row[1:4] + softmax_row[1:4])
+
+    if os.path.dirname(filename) and not os.path.exists(os.path.dirname(filename)):
+        os.makedirs(os.path.dirname(filename))
+    with open(filename, "w") as output:
+        writer = csv.writer(output, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs B_D experiments in a process pool and merges their CSV results.")
+    parser.add_argument("scripts", nargs="*", help="experiment scripts, e.g. mnist_nn_one_hidden.py")
+    parser.add_argument("--arch", nargs="+", default=[], choices=arch_names)
+    parser.add_argument("--dataset", nargs="+", default=["mnist"], choices=dataset_names)
+    parser.add_argument("--config", nargs="+", type=int, default=all_configs, choices=all_configs)
+    parser.add_argument("--workers", type=int, default=0, help="number of parallel runs (default: one per core, at most one per run)")
+    parser.add_argument("--threads", type=int, default=0, help="TensorFlow threads per run (default: cores / workers)")
+    parser.add_argument("--pipeline", action="store_true", help="tf.data input pipeline instead of feed_dict batches")
+    parser.add_argument("--fused", action="store_true", help="run all train ops of a step in a single sess.run")
+    parser.add_argument("--resume", action="store_true", help="continue every run from its latest checkpoint")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="every worker loads the dataset itself instead of mapping the shared cache in data/cache")
+    parser.add_argument("--output", default="csv/sweep_results.csv")
+    args = parser.parse_args(argv)
+
+    pairs = [parse_script(script, arch_names, dataset_names) for script in args.scripts]
+    pairs += [(dataset_name, arch_name) for dataset_name in args.dataset for arch_name in args.arch]
+    runs = [(dataset_name, arch_name, config_num) for dataset_name, arch_name in pairs for config_num in args.config]
+    if not runs:
+        parser.error("no runs: give scripts or --arch")
+
+    if hasattr(os, "sched_getaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+    else:
+        available = list(range(multiprocessing.cpu_count()))
+    num_cores = len(available)
+    workers = args.workers or min(num_cores, len(runs))
+    threads = args.threads or max(1, num_cores // workers)
+    print(str(len(runs)) + " runs on " + str(workers) + " workers with " + str(threads) + " threads each")
+
+    # every worker gets its own block of cores
+    context = multiprocessing.get_context("spawn")
+    core_sets = [set(available[(w * threads + t) % num_cores] for t in range(threads)) for w in range(workers)]
+    started = context.Value('i', 0)
+
+    # pool workers are daemonic and cannot start the background plot process
+    options = dict(use_pipeline=args.pipeline, fused_step=args.fused, resume=args.resume, sync_plots=True)
+    tasks = [(dataset_name, arch_name, config_num, threads, not args.no_cache, options)
+             for dataset_name, arch_name, config_num in runs]
+    pool = context.Pool(workers, initializer=init_worker, initargs=(threads, core_sets, started))
+    failed = []
+    results = []
+    for name, dataset_name, arch_name, config_num, elapsed, error in pool.imap_unordered(run_task, tasks):
+        results.append((name, dataset_name, arch_name, config_num))
+        print(dataset_name + " " + arch_name + " config " + str(config_num) + (" failed" if error else " done")
+              + " in %.1fs" % elapsed)
+        if error:
+            print(error)
+            failed.append((dataset_name, arch_name, config_num))
+    pool.close()
+    pool.join()
+
+    num_rows = collect_results(sorted(results, key=lambda result: runs.index(result[1:])), args.output)
+    print("Wrote " + str(num_rows) + " rows to " + args.output
+          + ("" if not failed else " (" + str(len(failed)) + " runs failed)"))
+
+
+if __name__ == "__main__":
+    main()
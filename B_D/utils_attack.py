@@ -0,0 +1,173 @@
+import tensorflow as tf
+import numpy as np
+import time
+from cleverhans.attacks import FastGradientMethod
+
+
+class FGSMEvaluator(object):
+    """FGSM attack graph built once against a placeholder.
+
+    Creating a new FastGradientMethod and calling generate_np at every
+    checkpoint adds a fresh copy of the attack ops to the graph each time.
+    This builds them a single time and only feeds new inputs afterwards.
+    """
+
+    def __init__(self, model, sess, shape, fgsm_params):
+        self.sess = sess
+        self.fgsm_params = dict(fgsm_params)
+        with tf.name_scope("fgsm"):
+            self.x = tf.placeholder(tf.float32, shape)
+            attack = FastGradientMethod(model, sess=sess)
+            self.adv_x = tf.stop_gradient(attack.generate(self.x, **self.fgsm_params))
+
+    def generate_np(self, x):
+        return self.sess.run(self.adv_x, {self.x: x})
+
+
+class FGSMCurveEvaluator(object):
+    """FGSM at a list of epsilons from one gradient computation per batch.
+
+    FGSM perturbs x by eps * sign(gradient) of the loss against the model's
+    own predictions (what FastGradientMethod does without labels), and that
+    sign does not depend on eps. It is computed once for every batch of the
+    test set and each epsilon only costs a clip and a forward pass.
+    """
+
+    def __init__(self, model, sess, shape, epsilons, clip_min=0., clip_max=1.):
+        self.sess = sess
+        self.epsilons = list(epsilons)
+        self.clip_min = clip_min
+        self.clip_max = clip_max
+        with tf.name_scope("fgsm_curve"):
+            self.x = tf.placeholder(tf.float32, shape)
+            logits = model.get_logits(self.x)
+            y = tf.to_float(tf.equal(logits, tf.reduce_max(logits, 1, keep_dims=True)))
+            y = tf.stop_gradient(y / tf.reduce_sum(y, 1, keep_dims=True))
+            loss = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits(logits=logits, labels=y))
+            self.grad_sign = tf.sign(tf.gradients(loss, self.x)[0])
+
+    def evaluate(self, evaluator, images, labels):
+        # Returns [eps, accuracy, max sigmoid, max softmax] for every epsilon,
+        # with the adversarial examples fed to the inputs of a BatchedEvaluator
+        num_eps = len(self.epsilons)
+        num_correct = np.zeros(num_eps, np.int64)
+        max_sigmoid = np.full(num_eps, -np.inf)
+        max_softmax = np.full(num_eps, -np.inf)
+        fetches = [evaluator.num_correct, evaluator.max_sigmoid, evaluator.max_softmax]
+        for start in range(0, images.shape[0], evaluator.batch_size):
+            batch_X = images[start:start + evaluator.batch_size]
+            batch_Y = labels[start:start + evaluator.batch_size]
+            grad_sign = self.sess.run(self.grad_sign, {self.x: batch_X})
+            for k, eps in enumerate(self.epsilons):
+                adv_x = np.clip(batch_X + eps * grad_sign, self.clip_min, self.clip_max)
+                correct, sigmoid, softmax = self.sess.run(fetches, {evaluator.x: adv_x, evaluator.y_: batch_Y})
+                num_correct[k] += correct
+                max_sigmoid[k] = max(max_sigmoid[k], sigmoid)
+                max_softmax[k] = max(max_softmax[k], softmax)
+        return [[eps, num_correct[k] / float(images.shape[0]), np.float32(max_sigmoid[k]), np.float32(max_softmax[k])]
+                for k, eps in enumerate(self.epsilons)]
+
+
+class IterativeAttackEvaluator(object):
+    """BIM/PGD robustness of mini-batches, with per-sample early exit.
+
+    Every iteration moves the adversarial examples by eps_iter * sign of the
+    gradient of the loss against the true labels, then projects them back
+    into the eps ball around the test images and into [clip_min, clip_max]
+    (rand_init starts from a random point of the ball, as PGD). The same
+    sess.run also returns whether each current example is still classified
+    correctly; examples that are already misclassified are dropped from
+    the following iterations, so a batch gets cheaper as the attack
+    succeeds (an example counts as broken if any iterate fools the model;
+    early_exit=False runs every example to the last iteration instead).
+    The attack graph is built once, like FGSMEvaluator, and the random
+    starts have their own seed so they leave np.random untouched.
+    """
+
+    def __init__(self, model, sess, shape, eps, eps_iter, nb_iter, rand_init=False, clip_min=0., clip_max=1.,
+                 batch_size=1000, seed=0, early_exit=True):
+        self.sess = sess
+        self.eps = eps
+        self.eps_iter = eps_iter
+        self.nb_iter = nb_iter
+        self.rand_init = rand_init
+        self.clip_min = clip_min
+        self.clip_max = clip_max
+        self.batch_size = batch_size
+        self.rng = np.random.RandomState(seed)
+        self.early_exit = early_exit
+        with tf.name_scope("iterative_attack"):
+            self.x = tf.placeholder(tf.float32, shape)
+            self.x_adv = tf.placeholder(tf.float32, shape)
+            logits = model.get_logits(self.x_adv)
+            self.y = tf.placeholder(tf.float32, logits.get_shape())
+            self.correct = tf.equal(tf.argmax(logits, 1), tf.argmax(self.y, 1))
+            self.max_sigmoid = tf.reduce_max(tf.nn.sigmoid(logits), 1)
+            self.max_softmax = tf.reduce_max(tf.nn.softmax(logits), 1)
+            loss = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits(logits=logits, labels=self.y))
+            step = self.x_adv + eps_iter * tf.sign(tf.gradients(loss, self.x_adv)[0])
+            step = tf.clip_by_value(step, self.x - eps, self.x + eps)
+            self.next_x_adv = tf.stop_gradient(tf.clip_by_value(step, clip_min, clip_max))
+
+    def attack_batch(self, batch_X, batch_Y):
+        # Returns per-sample correct, max sigmoid and max softmax of the final
+        # adversarial examples, and the number of examples run through the model
+        num_images = batch_X.shape[0]
+        correct = np.ones(num_images, bool)
+        max_sigmoid = np.zeros(num_images, np.float32)
+        max_softmax = np.zeros(num_images, np.float32)
+        active = np.arange(num_images)
+        x_adv = batch_X
+        if self.rand_init:
+            x_adv = np.clip(batch_X + self.rng.uniform(-self.eps, self.eps, batch_X.shape), self.clip_min, self.clip_max)
+        x_adv = x_adv.astype(np.float32)
+        work = 0
+        for iteration in range(self.nb_iter + 1):
+            fetches = [self.correct, self.max_sigmoid, self.max_softmax]
+            if iteration < self.nb_iter:
+                fetches.append(self.next_x_adv)
+            values = self.sess.run(fetches, {self.x: batch_X[active], self.x_adv: x_adv, self.y: batch_Y[active]})
+            work += len(active)
+            correct[active], max_sigmoid[active], max_softmax[active] = values[:3]
+            if iteration == self.nb_iter:
+                break
+            # misclassified examples keep their current values and leave the attack
+            still_correct = values[0] if self.early_exit else np.ones(len(active), bool)
+            active = active[still_correct]
+            if len(active) == 0:
+                break
+            x_adv = values[3][still_correct]
+        return correct, max_sigmoid, max_softmax, work
+
+    def evaluate(self, images, labels, time_budget=None):
+        """Accuracy and max sigmoid/softmax on the adversarial examples.
+
+        With time_budget (seconds), batches are attacked until the budget
+        is spent and the values cover the first num_evaluated test images.
+        Returns [accuracy, max sigmoid, max softmax, num_evaluated, iterations],
+        iterations being the mean number of forward passes per image.
+        """
+        start = time.time()
+        num_correct = 0
+        num_evaluated = 0
+        work = 0
+        max_sigmoid = -np.inf
+        max_softmax = -np.inf
+        for begin in range(0, images.shape[0], self.batch_size):
+            if time_budget is not None and num_evaluated > 0 and time.time() - start > time_budget:
+                break
+            correct, sigmoid, softmax, batch_work = self.attack_batch(images[begin:begin + self.batch_size],
+                                                                      labels[begin:begin + self.batch_size])
+            num_correct += np.sum(correct)
+            num_evaluated += len(correct)
+            work += batch_work
+            max_sigmoid = max(max_sigmoid, np.max(sigmoid))
+            max_softmax = max(max_softmax, np.max(softmax))
+        return [num_correct / float(num_evaluated), np.float32(max_sigmoid), np.float32(max_softmax), num_evaluated,
+                work / float(num_evaluated)]
+
+
+def graph_size(graph=None):
+    # Number of operations in the graph, used to check it stops growing
+    graph = graph if graph is not None else tf.get_default_graph()
+    return len(graph.get_operations())
@@ -0,0 +1,57 @@
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# Read-only dataset cache shared by concurrent runs. The first process that
+# needs a dataset decodes and normalizes it into data/cache/<name>-<key>/,
+# one .npy file per array, while the others wait on a lock; every process
+# then maps the files with np.load(mmap_mode="r"), so all runs share one
+# copy in the page cache instead of each holding its own. key hashes the
+# path, size and modification time of the source files: a new download
+# builds a new folder and the old one is removed.
+
+cache_root = "data/cache"
+
+
+def source_key(paths):
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(("%s %d %d\n" % (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)).encode())
+    return digest.hexdigest()[:16]
+
+
+def open_arrays(folder):
+    # Read-only memory maps of every array of a cache folder
+    return dict((filename[:-len(".npy")], np.load(os.path.join(folder, filename), mmap_mode="r"))
+                for filename in os.listdir(folder) if filename.endswith(".npy"))
+
+
+def cached_arrays(name, sources, build, root=cache_root):
+    """Arrays of a dataset, memory-mapped from the cache.
+
+    build() returns the dict of arrays to cache and only runs when there is
+    no folder for the current source files yet. The folder is written
+    under a temporary name and renamed when complete, so a run never maps
+    a partial cache.
+    """
+    folder = os.path.join(root, name + "-" + source_key(sources))
+    if not os.path.isdir(folder):
+        if not os.path.exists(root):
+            os.makedirs(root)
+        with open(os.path.join(root, name + ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # another run may have built it while this one waited
+            if not os.path.isdir(folder):
+                tmp = tempfile.mkdtemp(prefix=name + ".tmp", dir=root)
+                for key, array in build().items():
+                    np.save(os.path.join(tmp, key + ".npy"), array)
+                os.rename(tmp, folder)
+                # runs still mapping an old folder keep their pages until they exit
+                for other in os.listdir(root):
+                    if other.startswith(name + "-") and other != os.path.basename(folder):
+                        shutil.rmtree(os.path.join(root, other), ignore_errors=True)
+    return open_arrays(folder)
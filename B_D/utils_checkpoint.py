@@ -0,0 +1,85 @@
+import os
+import pickle
+import shutil
+import numpy as np
+import tensorflow as tf
+
+
+def write_atomic(filename, data):
+    # The file either keeps its old content or gets all of the new one
+    tmp = filename + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+
+class RunCheckpoint(object):
+    """Periodic checkpoints of a training run that can be resumed exactly.
+
+    A checkpoint is a folder step-<step> holding the TensorFlow variables
+    (weights, optimizer slots and step counters, batch norm statistics)
+    and state.pkl with the Python side of the run: the NumPy RNG state, the
+    states of the RandomStates given as rngs (name -> RandomState) and
+    whatever the caller passes (input order, metric lists, ...). It is
+    written under a temporary name and renamed when complete, then the
+    "latest" file is replaced to point at it, so a crash at any point
+    leaves the previous checkpoint usable.
+
+    Must be created inside the graph of the run, after all variables.
+    """
+
+    def __init__(self, folder, max_to_keep=2, rngs=None):
+        self.folder = folder
+        self.max_to_keep = max_to_keep
+        self.rngs = rngs or {}
+        self.saver = tf.train.Saver(max_to_keep=None)
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+    def latest(self):
+        # name of the newest complete checkpoint, None if there is none
+        try:
+            with open(os.path.join(self.folder, "latest")) as f:
+                name = f.read().strip()
+        except IOError:
+            return None
+        return name if os.path.isdir(os.path.join(self.folder, name)) else None
+
+    def save(self, sess, step, state):
+        name = "step-" + str(step).zfill(6)
+        tmp = os.path.join(self.folder, "tmp-" + name)
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(tmp)
+
+        self.saver.save(sess, os.path.join(tmp, "model"), write_meta_graph=False, write_state=False)
+        state = dict(state, step=step, numpy_rng=np.random.get_state(),
+                     rngs=dict((name, rng.get_state()) for name, rng in self.rngs.items()))
+        write_atomic(os.path.join(tmp, "state.pkl"), pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+        final = os.path.join(self.folder, name)
+        if os.path.exists(final):
+            shutil.rmtree(final)
+        os.rename(tmp, final)
+        write_atomic(os.path.join(self.folder, "latest"), name.encode())
+
+        # older checkpoints are only removed once the new one is in place
+        names = sorted(n for n in os.listdir(self.folder) if n.startswith("step-"))
+        for old in names[:-self.max_to_keep]:
+            shutil.rmtree(os.path.join(self.folder, old))
+
+    def restore(self, sess):
+        # Loads the variables and the RNG states, returns the saved state (None without checkpoint)
+        name = self.latest()
+        if name is None:
+            return None
+        self.saver.restore(sess, os.path.join(self.folder, name, "model"))
+        with open(os.path.join(self.folder, name, "state.pkl"), "rb") as f:
+            state = pickle.load(f)
+        np.random.set_state(state.pop("numpy_rng"))
+        for name, rng_state in state.pop("rngs", {}).items():
+            if name in self.rngs:
+                self.rngs[name].set_state(rng_state)
+        return state
@@ -0,0 +1,80 @@
+import tensorflow as tf
+import numpy as np
+
+
+class BatchedEvaluator(object):
+    """Streams a dataset through one classifier input in mini-batches.
+
+    Accuracy, mean loss and the max sigmoid/softmax outputs are accumulated
+    batch by batch, so peak memory depends on batch_size instead of on the
+    size of the test set. run() then evaluates the requested fetches (for
+    example the merged summaries) with the accumulated values fed in place
+    of the scalar tensors, which gives the same numbers as one full-set
+    sess.run.
+    """
+
+    def __init__(self, sess, x, y_, correct_prediction, accuracy=None, loss=None,
+                 max_sigmoid=None, max_softmax=None, batch_size=1000):
+        self.sess = sess
+        self.x = x
+        self.y_ = y_
+        self.accuracy = accuracy
+        self.loss = loss
+        self.max_sigmoid = max_sigmoid
+        self.max_softmax = max_softmax
+        self.batch_size = batch_size
+        self.first_batch = None
+        with tf.name_scope("batched_eval"):
+            self.num_correct = tf.reduce_sum(tf.cast(correct_prediction, tf.int32))
+
+    def evaluate(self, images, labels=None, transform=None):
+        # Returns a feed_dict holding the accumulated scalars and the first batch
+        num_images = images.shape[0]
+        num_correct = 0
+        loss_sum = 0.
+        max_sigmoid = -np.inf
+        max_softmax = -np.inf
+
+        max_fetches = [t for t in [self.max_sigmoid, self.max_softmax] if t is not None]
+        label_fetches = [self.num_correct] + ([self.loss] if self.loss is not None else [])
+
+        self.first_batch = None
+        for start in range(0, num_images, self.batch_size):
+            batch_X = images[start:start + self.batch_size]
+            if transform is not None:
+                batch_X = transform(batch_X)
+            if self.first_batch is None:
+                self.first_batch = batch_X
+
+            feed_dict = {self.x: batch_X}
+            fetches = list(max_fetches)
+            if labels is not None:
+                feed_dict[self.y_] = labels[start:start + self.batch_size]
+                fetches += label_fetches
+            values = dict(zip(fetches, self.sess.run(fetches, feed_dict)))
+
+            if self.max_sigmoid is not None:
+                max_sigmoid = max(max_sigmoid, values[self.max_sigmoid])
+            if self.max_softmax is not None:
+                max_softmax = max(max_softmax, values[self.max_softmax])
+            if labels is not None:
+                num_correct += values[self.num_correct]
+                if self.loss is not None:
+                    loss_sum += values[self.loss] * batch_X.shape[0]
+
+        feed_dict = {self.x: self.first_batch}
+        if self.max_sigmoid is not None:
+            feed_dict[self.max_sigmoid] = np.float32(max_sigmoid)
+        if self.max_softmax is not None:
+            feed_dict[self.max_softmax] = np.float32(max_softmax)
+        if labels is not None:
+            feed_dict[self.y_] = labels[:self.first_batch.shape[0]]
+            if self.accuracy is not None:
+                feed_dict[self.accuracy] = np.float32(num_correct / float(num_images))
+            if self.loss is not None:
+                feed_dict[self.loss] = np.float32(loss_sum / num_images)
+        return feed_dict
+
+    def run(self, fetches, images, labels=None, transform=None):
+        # Drop-in replacement for sess.run(fetches, {x: images, y_: labels})
+        return self.sess.run(fetches, self.evaluate(images, labels, transform))
@@ -0,0 +1,116 @@
+import gzip
+import os
+import numpy as np
+
+# Reader of the IDX files of MNIST (http://yann.lecun.com/exdb/mnist/) in
+# data/mnist, in place of the deprecated tensorflow.examples.tutorials
+# input_data. The files unpacked by download_mnist.sh are memory-mapped,
+# .gz files are decompressed into memory. Images and labels are handed out
+# as views that convert only the rows they are indexed with, to the values
+# of the tutorial DataSet: float32 pixels * (1 / 255) and one-hot labels.
+
+mnist_names = {"x_train": "train-images-idx3-ubyte", "y_train": "train-labels-idx1-ubyte",
+               "x_test": "t10k-images-idx3-ubyte", "y_test": "t10k-labels-idx1-ubyte"}
+
+# IDX type byte -> dtype of the (big-endian) values
+idx_dtypes = {0x08: np.dtype(np.uint8), 0x09: np.dtype(np.int8), 0x0B: np.dtype(">i2"),
+              0x0C: np.dtype(">i4"), 0x0D: np.dtype(">f4"), 0x0E: np.dtype(">f8")}
+
+
+def parse_header(header, path):
+    # magic number: two zero bytes, the type of the values and the number of dimensions
+    if len(header) < 4 or header[0] != 0 or header[1] != 0 or header[2] not in idx_dtypes:
+        raise ValueError("not an IDX file: " + path)
+    ndim = header[3]
+    shape = tuple(int(size) for size in np.frombuffer(header[4:4 + 4 * ndim], ">u4"))
+    return idx_dtypes[header[2]], shape, 4 + 4 * ndim
+
+
+def read_idx(path):
+    """Array of an IDX file, memory-mapped read-only unless the file is gzipped."""
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            data = f.read()
+        dtype, shape, offset = parse_header(bytearray(data[:4 + 4 * 255]), path)
+        return np.frombuffer(data, dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+    with open(path, "rb") as f:
+        header = bytearray(f.read(4))
+        header += bytearray(f.read(4 * header[3])) if len(header) == 4 else b""
+    dtype, shape, offset = parse_header(header, path)
+    if os.path.getsize(path) < offset + int(np.prod(shape)) * dtype.itemsize:
+        raise ValueError("truncated IDX file: " + path)
+    return np.memmap(path, dtype, mode="r", offset=offset, shape=shape)
+
+
+class ScaledImages(object):
+    """float32 view of uint8 pixels, converted row by row when indexed.
+
+    Indexing along the first axis returns the rows as float32 * (1 / 255),
+    the values of the tutorial DataSet; np.asarray converts all of them.
+    """
+
+    def __init__(self, pixels):
+        self.pixels = pixels
+        self.shape = pixels.shape
+        self.ndim = pixels.ndim
+        self.dtype = np.dtype(np.float32)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        return np.multiply(self.pixels[key].astype(np.float32), 1.0 / 255.0)
+
+    def __array__(self, dtype=None, copy=None):
+        images = self[:]
+        return images if dtype is None else images.astype(dtype)
+
+
+class OneHotLabels(object):
+    """One-hot view of class indices, built for the rows it is indexed with."""
+
+    def __init__(self, labels, num_classes=10, dtype=np.float32):
+        self.labels = labels
+        self.num_classes = num_classes
+        self.shape = (labels.shape[0], num_classes)
+        self.ndim = 2
+        self.dtype = np.dtype(dtype)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        return np.eye(self.num_classes, dtype=self.dtype)[self.labels[key]]
+
+    def __array__(self, dtype=None, copy=None):
+        labels = self[:]
+        return labels if dtype is None else labels.astype(dtype)
+
+
+def mnist_files(folder="data/mnist"):
+    # the files unpacked by download_mnist.sh, or the .gz ones of the tutorial download
+    paths = {}
+    for key, name in mnist_names.items():
+        path = os.path.join(folder, name)
+        paths[key] = path if os.path.exists(path) or not os.path.exists(path + ".gz") else path + ".gz"
+    return paths
+
+
+def unpacked(paths):
+    # True if every file exists and can be memory-mapped
+    return all(os.path.exists(path) and not path.endswith(".gz") for path in paths)
+
+
+def read_mnist(folder="data/mnist"):
+    """MNIST as views of the IDX files.
+    Returns a dict with x_train and x_test, ScaledImages of shape (n, 28, 28, 1),
+    and y_train and y_test, OneHotLabels of shape (n, 10).
+    """
+    paths = mnist_files(folder)
+    arrays = {}
+    for key in ["x_train", "x_test"]:
+        pixels = read_idx(paths[key])
+        arrays[key] = ScaledImages(pixels.reshape(pixels.shape + (1,)))
+    for key in ["y_train", "y_test"]:
+        arrays[key] = OneHotLabels(read_idx(paths[key]))
+    return arrays
@@ -0,0 +1,206 @@
+import tensorflow as tf
+import numpy as np
+
+# Training images are either float32 in [0, 1] or the uint8 pixels as
+# loaded, which take a quarter of the memory; the inputs below convert
+# uint8 images one batch at a time.
+pixel_scale = 255
+
+
+def to_float(images):
+    # Same values as converting the whole uint8 array up front: float32 / 255
+    if images.dtype == np.uint8:
+        return images.astype(np.float32) / np.float32(pixel_scale)
+    return images
+
+
+class FeedDictInput(object):
+    """Training batches fed as NumPy arrays through feed_dict on every sess.run."""
+
+    def __init__(self, next_batch_fn):
+        self.next_batch_fn = next_batch_fn
+
+    def images_placeholder(self, shape):
+        return tf.placeholder(tf.float32, shape)
+
+    def labels_placeholder(self, shape):
+        return tf.placeholder(tf.float32, shape)
+
+    def start(self, sess):
+        pass
+
+    def next_batch(self):
+        return self.next_batch_fn()
+
+    def feed(self, feed_dict):
+        return feed_dict
+
+    def get_state(self):
+        # Position in the training set, for checkpoints; None if it cannot be saved
+        return None
+
+    def set_state(self, state):
+        pass
+
+
+class ArrayBatches(FeedDictInput):
+    """feed_dict batches of in-memory arrays, reshuffled with np.random every epoch.
+
+    The epoch order is an index permutation; every batch gathers its rows
+    from the arrays, which are never copied as a whole.
+    """
+
+    def __init__(self, images, labels, batch_size):
+        self.images = images
+        self.labels = labels
+        # batches are images[order] in slices of batch_size
+        self.order = np.arange(images.shape[0])
+        self.batch_size = batch_size
+        self.num_batches = images.shape[0] // batch_size
+        self.step = 0
+
+    def next_batch(self):
+        if self.step % self.num_batches == 0:
+            idx_train = np.arange(self.images.shape[0])
+            np.random.shuffle(idx_train)
+            self.order = self.order[idx_train]
+
+        idx = self.step % self.num_batches
+        self.step += 1
+        batch = self.order[idx*self.batch_size:(idx+1)*self.batch_size]
+        return to_float(self.images[batch]), self.labels[batch]
+
+    def get_state(self):
+        return {"order": self.order, "step": self.step}
+
+    def set_state(self, state):
+        self.order, self.step = state["order"], state["step"]
+
+
+class EpochBatches(FeedDictInput):
+    """feed_dict batches with the semantics of the MNIST tutorial DataSet.next_batch.
+
+    The order is shuffled with np.random before the first batch and at every
+    epoch boundary, and a batch that crosses the boundary is completed with
+    the start of the next epoch, so the batches are the same as the ones of
+    mnist.train.next_batch. Only an index order is kept and shuffled, which
+    is also what get_state saves.
+    """
+
+    def __init__(self, images, labels, batch_size):
+        self.images = images
+        self.labels = labels
+        self.batch_size = batch_size
+        self.num_examples = images.shape[0]
+        self.order = np.arange(self.num_examples)
+        self.index_in_epoch = 0
+        self.epochs_completed = 0
+
+    def shuffle(self):
+        perm = np.arange(self.num_examples)
+        np.random.shuffle(perm)
+        self.order = self.order[perm]
+
+    def next_batch(self):
+        start = self.index_in_epoch
+        # Shuffle for the first epoch
+        if self.epochs_completed == 0 and start == 0:
+            self.shuffle()
+        if start + self.batch_size > self.num_examples:
+            # Finished epoch: the rest of this one, then the start of the next one
+            self.epochs_completed += 1
+            rest = self.order[start:]
+            self.shuffle()
+            self.index_in_epoch = self.batch_size - rest.shape[0]
+            idx = np.concatenate((rest, self.order[:self.index_in_epoch]))
+        else:
+            self.index_in_epoch += self.batch_size
+            idx = self.order[start:self.index_in_epoch]
+        return to_float(self.images[idx]), self.labels[idx]
+
+    def get_state(self):
+        return {"order": self.order, "index_in_epoch": self.index_in_epoch, "epochs_completed": self.epochs_completed}
+
+    def set_state(self, state):
+        self.order = state["order"]
+        self.index_in_epoch = state["index_in_epoch"]
+        self.epochs_completed = state["epochs_completed"]
+
+
+class InputPipeline(FeedDictInput):
+    """tf.data pipeline with shuffle, batching and background prefetch.
+
+    The placeholders handed out by images_placeholder/labels_placeholder
+    default to the output of a cond on a boolean placeholder: the first
+    sess.run of a step that uses the batch (one whose feed_dict names a
+    pipeline placeholder, as the runner does for the runs that read the
+    batch) takes it straight from the iterator and also stores it in two
+    local variables; the other runs of the step read those, so the
+    classifier, discriminator and generator updates all see the same batch
+    without an extra sess.run or a copy from Python. Feeding any of the
+    placeholders explicitly (e.g. with the test set) still works.
+
+    The shuffle buffer is not part of checkpoints: a resumed run restarts
+    the pipeline with a new order. uint8 images stay uint8 in the runtime
+    copy and the shuffle buffer, and are converted batch by batch.
+    """
+
+    def __init__(self, images, labels, batch_size, prefetch=2):
+        self.images = images
+        self.labels = labels
+        self.placeholders = set()
+        self.pending = False
+        with tf.name_scope("pipeline"):
+            self.images_source = tf.placeholder(tf.as_dtype(images.dtype), images.shape)
+            self.labels_source = tf.placeholder(tf.float32, labels.shape)
+            dataset = tf.data.Dataset.from_tensor_slices((self.images_source, self.labels_source))
+            # shuffling before repeat gives a fresh permutation at every epoch boundary
+            dataset = dataset.shuffle(images.shape[0]).repeat().batch(batch_size)
+            if images.dtype == np.uint8:
+                dataset = dataset.map(lambda x, y: (tf.cast(x, tf.float32) / pixel_scale, y))
+            dataset = dataset.prefetch(prefetch)
+            self.iterator = dataset.make_initializable_iterator()
+
+            # local variables, so that no Saver writes them into the checkpoints
+            self.batch_X = tf.Variable(tf.zeros([batch_size] + list(images.shape[1:])), trainable=False,
+                                       collections=[tf.GraphKeys.LOCAL_VARIABLES], name="batch_X")
+            self.batch_Y = tf.Variable(tf.zeros([batch_size] + list(labels.shape[1:])), trainable=False,
+                                       collections=[tf.GraphKeys.LOCAL_VARIABLES], name="batch_Y")
+            self.batch_initializer = tf.variables_initializer([self.batch_X, self.batch_Y])
+            self.advance = tf.placeholder_with_default(False, [])
+
+            def next_batch():
+                next_X, next_Y = self.iterator.get_next()
+                with tf.control_dependencies([tf.assign(self.batch_X, next_X), tf.assign(self.batch_Y, next_Y)]):
+                    return tf.identity(next_X), tf.identity(next_Y)
+
+            self.current_X, self.current_Y = tf.cond(self.advance, next_batch,
+                                                     lambda: (self.batch_X.read_value(), self.batch_Y.read_value()))
+
+    def images_placeholder(self, shape):
+        placeholder = tf.placeholder_with_default(self.current_X, shape)
+        self.placeholders.add(placeholder)
+        return placeholder
+
+    def labels_placeholder(self, shape):
+        placeholder = tf.placeholder_with_default(self.current_Y, shape)
+        self.placeholders.add(placeholder)
+        return placeholder
+
+    def start(self, sess):
+        # The training set is copied into the runtime once, here
+        sess.run(self.batch_initializer)
+        sess.run(self.iterator.initializer, {self.images_source: self.images, self.labels_source: self.labels})
+
+    def next_batch(self):
+        # The next run that uses the batch takes it from the iterator; there are no NumPy arrays to return
+        self.pending = True
+        return None, None
+
+    def feed(self, feed_dict):
+        uses_batch = any(k in self.placeholders for k in feed_dict)
+        feed_dict = {k: v for k, v in feed_dict.items() if k not in self.placeholders}
+        if uses_batch and self.pending:
+            feed_dict[self.advance] = True
+            self.pending = False
+        return feed_dict
@@ -0,0 +1,109 @@
+import csv
+import os
+
+# Checkpoint metrics of a run: accuracy.csv, sigmoid.csv and softmax.csv
+# hold one row [step, test, noise, adv, counter] per checkpoint, the same
+# rows the scripts used to write at the end of training. Runs evaluating
+# more attacks add one file per attack, with rows starting with
+# [step, eps, accuracy, sigmoid, softmax]:
+#   fgsm_curve.csv       [..., counter] per checkpoint and epsilon
+#   iterative_attack.csv [..., evaluated images, forward passes per image, counter]
+
+metric_files = ["accuracy", "sigmoid", "softmax"]
+attack_files = {"fgsm_curve": "fgsm", "iterative_attack": "iterative"}
+
+# Best value of every column: highest accuracy, highest confidence on the
+# test images and lowest confidence on random noise and adversarial examples
+best_modes = {"accuracy": [("test", max), ("noisy", max), ("adv", max)],
+              "sigmoid": [("test", max), ("noise", min), ("adv", min)],
+              "softmax": [("test", max), ("noise", min), ("adv", min)]}
+attack_modes = [("accuracy", max), ("sigmoid", min), ("softmax", min)]
+
+
+class MetricsWriter(object):
+    """Append-only CSV sink with a running best-value summary.
+
+    Every row is written and flushed as soon as it is produced, so the CSV
+    files can be read while the run is in progress. The best values are
+    updated in memory and summary.txt is rewritten (atomically) after each
+    checkpoint. rows holds the rows of the three files to start with, e.g.
+    the lists of a resumed run; the files are rewritten from them, which
+    drops rows written after the checkpoint the run resumed from.
+    attack_rows maps the names of attack_files the run evaluates to their
+    rows to start with (empty lists for a new run).
+    """
+
+    def __init__(self, folder_csv, rows=None, attack_rows=None):
+        self.folder_csv = folder_csv
+        self.files = [open(os.path.join(folder_csv, name + ".csv"), "w") for name in metric_files]
+        self.writers = [csv.writer(f, lineterminator='\n') for f in self.files]
+        self.attack_files = {}
+        for name in attack_rows or {}:
+            f = open(os.path.join(folder_csv, name + ".csv"), "w")
+            self.attack_files[name] = (f, csv.writer(f, lineterminator='\n'))
+        self.best = {}
+        self.attack_keys = []
+        self.num_rows = 0
+        if rows is not None:
+            for metric_rows in zip(*rows):
+                self.append(*metric_rows, write_summary=False)
+            self.append_attacks(attack_rows or {})
+            self.write_summary()
+
+    def update_best(self, key, value, step, better):
+        # ties keep the earliest step
+        if key not in self.best or (value > self.best[key][0] if better is max else value < self.best[key][0]):
+            self.best[key] = (value, step)
+
+    def append(self, accuracy_row, sigmoid_row, softmax_row, attack_rows=None, write_summary=True):
+        for f, writer, row in zip(self.files, self.writers, [accuracy_row, sigmoid_row, softmax_row]):
+            writer.writerow(row)
+            f.flush()
+
+        for name, row in zip(metric_files, [accuracy_row, sigmoid_row, softmax_row]):
+            for k, (column, better) in enumerate(best_modes[name]):
+                self.update_best(name + " " + column, row[k+1], row[0], better)
+        self.append_attacks(attack_rows or {})
+        self.num_rows += 1
+        self.last_step = accuracy_row[0]
+
+        if write_summary:
+            self.write_summary()
+
+    def append_attacks(self, attack_rows):
+        for name in sorted(attack_rows):
+            f, writer = self.attack_files[name]
+            for row in attack_rows[name]:
+                writer.writerow(row)
+                for k, (column, better) in enumerate(attack_modes):
+                    key = attack_files[name] + " eps=" + str(row[1]) + " " + column
+                    if key not in self.best:
+                        self.attack_keys.append((key, better))
+                    self.update_best(key, row[k+2], row[0], better)
+            f.flush()
+
+    def summary(self):
+        lines = ["Best values after " + str(self.num_rows) + " checkpoints (last step " + str(self.last_step) + ")"]
+        for name in metric_files:
+            for column, better in best_modes[name]:
+                value, step = self.best[name + " " + column]
+                lines.append(name + " " + column + ("" if better is max else " (lowest)") + ":\t"
+                             + str(value) + "\tat step " + str(step))
+        for key, better in self.attack_keys:
+            value, step = self.best[key]
+            lines.append(key + ("" if better is max else " (lowest)") + ":\t" + str(value) + "\tat step " + str(step))
+        return "\n".join(lines) + "\n"
+
+    def write_summary(self):
+        if self.num_rows == 0:
+            return
+        filename = os.path.join(self.folder_csv, "summary.txt")
+        with open(filename + ".tmp", "w") as f:
+            f.write(self.summary())
+        os.replace(filename + ".tmp", filename)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+        for f, writer in self.attack_files.values():
+            f.close()
@@ -0,0 +1,264 @@
+import numpy as np
+import multiprocessing
+import queue
+import time
+import matplotlib
+import matplotlib.pyplot as plt
+import matplotlib.gridspec as gridspec
+from matplotlib import cm
+from matplotlib import colors
+
+
+def image_reshape(image_shape):
+    # grayscale images are drawn as 2-D arrays with the gray colormap
+    if image_shape[-1] == 1:
+        return tuple(image_shape[:2]), 'gray'
+    return tuple(image_shape), None
+
+
+def plot_generator(samples, image_shape, grid=(2, 5)):
+    rows, cols = grid
+    shape, cmap = image_reshape(image_shape)
+    fig = plt.figure(figsize=(cols, rows))
+    gs = gridspec.GridSpec(rows, cols)
+    gs.update(wspace=0.05, hspace=0.05)
+    for i, sample in enumerate(samples):
+        ax = plt.subplot(gs[i])
+        plt.axis('off')
+        ax.set_xticklabels([])
+        ax.set_yticklabels([])
+        ax.set_aspect('equal')
+        plt.imshow(sample.reshape(shape), cmap=cmap)
+
+    return fig
+
+
+def plot_first_hidden(weights, image_shape, grid):
+    # one image per hidden unit: a diverging colormap with a colorbar for
+    # grayscale inputs, min-max scaled RGB for colour inputs
+    rows, cols = grid
+    shape, cmap = image_reshape(image_shape)
+    fig = plt.figure(figsize=(cols, rows))
+    gs = gridspec.GridSpec(rows, cols)
+    gs.update(wspace=0.1, hspace=0.1)
+
+    if cmap is None:
+        max_val = np.max(weights)
+        min_val = np.min(weights)
+        weights = (weights-min_val) / (max_val-min_val)
+    else:
+        max_abs_val = max(abs(np.max(weights)), abs(np.min(weights)))
+
+    for i, weight in enumerate(np.transpose(weights)):
+        ax = plt.subplot(gs[i])
+        ax.set_xticklabels([])
+        ax.set_yticklabels([])
+        ax.set_aspect('equal')
+        if cmap is None:
+            plt.imshow(weight.reshape(shape))
+        else:
+            im = plt.imshow(weight.reshape(shape), cmap="seismic_r", vmin=-max_abs_val, vmax=max_abs_val)
+
+    if cmap is not None:
+        # Adding colorbar
+        # https://stackoverflow.com/questions/13784201/matplotlib-2-subplots-1-colorbar
+        fig.subplots_adjust(right=0.8)
+        cbar_ax = fig.add_axes([0.85, 0.15, 0.015, 0.7])
+        fig.colorbar(im, cax=cbar_ax, ticks=[-max_abs_val, 0, max_abs_val])
+
+    return fig
+
+
+def save(fig, filename):
+    plt.savefig(filename, bbox_inches='tight')
+    plt.close(fig)
+
+
+def tile(images, grid, pad, fill=255):
+    # (n, h, w, 3) uint8 images -> one (rows*h + (rows-1)*pad, cols*w + (cols-1)*pad, 3) mosaic, row-major like GridSpec
+    rows, cols = grid
+    n, h, w = images.shape[:3]
+    cells = np.full((rows * cols, h + pad, w + pad, 3), fill, dtype=np.uint8)
+    cells[:n, :h, :w] = images
+    mosaic = cells.reshape(rows, cols, h + pad, w + pad, 3).swapaxes(1, 2)
+    mosaic = mosaic.reshape(rows * (h + pad), cols * (w + pad), 3)
+    return mosaic[:rows * (h + pad) - pad, :cols * (w + pad) - pad]
+
+
+def to_rgb(images, cmap=None, vmin=None, vmax=None):
+    # Colours like imshow: a colormap for (n, h, w) arrays, clipped to [0, 1] for (n, h, w, 3)
+    if cmap is not None:
+        images = (images - vmin) / np.maximum(vmax - vmin, 1e-12)
+        return (matplotlib.colormaps[cmap](np.clip(images, 0., 1.))[..., :3] * 255).astype(np.uint8)
+    return (np.clip(images, 0., 1.) * 255).astype(np.uint8)
+
+
+def upscale(images, scale):
+    # nearest neighbour, one image pixel becomes scale x scale output pixels
+    return images.repeat(scale, axis=1).repeat(scale, axis=2)
+
+
+def mosaic_generator(samples, image_shape, grid=(2, 5), scale=3):
+    # Same tiles as plot_generator: grayscale samples are min-max scaled one by one, as imshow does
+    shape, cmap = image_reshape(image_shape)
+    images = np.asarray(samples, dtype=np.float32).reshape((-1,) + shape)
+    if cmap is None:
+        images = to_rgb(images)
+    else:
+        vmin = images.min(axis=(1, 2), keepdims=True)
+        vmax = images.max(axis=(1, 2), keepdims=True)
+        images = to_rgb(images, cmap, vmin, vmax)
+    return tile(upscale(images, scale), grid, pad=max(1, int(round(0.05 * shape[0] * scale))))
+
+
+def colorbar_figure(mosaic, max_abs_val, cmap="seismic_r", dpi=100):
+    # The mosaic in a single axes next to the colorbar of plot_first_hidden,
+    # one imshow instead of a subplot per tile
+    height, width = mosaic.shape[:2]
+    fig = plt.figure(figsize=(width / (0.8 * dpi), height / float(dpi)), dpi=dpi)
+    ax = fig.add_axes([0, 0, 0.8, 1])
+    ax.imshow(mosaic, interpolation='nearest')
+    ax.axis('off')
+    cbar_ax = fig.add_axes([0.85, 0.15, 0.015, 0.7])
+    mappable = cm.ScalarMappable(norm=colors.Normalize(-max_abs_val, max_abs_val), cmap=cmap)
+    mappable.set_array([])
+    fig.colorbar(mappable, cax=cbar_ax, ticks=[-max_abs_val, 0, max_abs_val])
+    return fig
+
+
+def mosaic_first_hidden(weights, image_shape, grid, scale=3):
+    # Same tiles as plot_first_hidden, one per column of weights. Grayscale
+    # inputs get the colorbar with its -max, 0, +max |weight| ticks, so they
+    # return a figure instead of an image
+    shape, cmap = image_reshape(image_shape)
+    images = np.transpose(np.asarray(weights, dtype=np.float32)).reshape((-1,) + shape)
+    pad = max(1, int(round(0.1 * shape[0] * scale)))
+    if cmap is None:
+        images = (images - images.min()) / max(images.max() - images.min(), 1e-12)
+        return tile(upscale(to_rgb(images), scale), grid, pad)
+
+    max_abs_val = np.abs(images).max()
+    mosaic = tile(upscale(to_rgb(images, "seismic_r", -max_abs_val, max_abs_val), scale), grid, pad)
+    return colorbar_figure(mosaic, max_abs_val)
+
+
+def save_mosaic(mosaic, filename):
+    plt.imsave(filename, mosaic)
+
+
+plot_functions = {"generator": plot_generator,
+                  "first_hidden": plot_first_hidden}
+
+mosaic_functions = {"generator": mosaic_generator,
+                    "first_hidden": mosaic_first_hidden}
+
+
+def render(kind, args, filename, renderer="mosaic"):
+    # "mosaic" composes the tiles with NumPy and writes the PNG directly (grayscale
+    # first_hidden goes in one axes next to its colorbar), "figure" builds the
+    # matplotlib figure with one subplot per tile
+    if renderer == "mosaic":
+        image = mosaic_functions[kind](*args)
+        if isinstance(image, np.ndarray):
+            save_mosaic(image, filename)
+        else:
+            save(image, filename)
+    else:
+        save(plot_functions[kind](*args), filename)
+
+
+class SyncPlotWriter(object):
+    """Renders and saves the checkpoint images on the calling thread."""
+
+    def __init__(self, renderer="mosaic"):
+        self.renderer = renderer
+        self.blocked_time = 0.
+
+    def generator(self, samples, image_shape, grid, filename):
+        self.submit("generator", (samples, image_shape, grid), filename)
+
+    def first_hidden(self, weights, image_shape, grid, filename):
+        self.submit("first_hidden", (weights, image_shape, grid), filename)
+
+    def submit(self, kind, args, filename):
+        start = time.time()
+        render(kind, args, filename, self.renderer)
+        self.blocked_time += time.time() - start
+
+    def close(self):
+        return self.blocked_time, self.blocked_time
+
+
+def plot_worker(tasks, render_time):
+    plt.switch_backend("Agg")
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        start = time.time()
+        render(*task)
+        with render_time.get_lock():
+            render_time.value += time.time() - start
+
+
+class PlotWriter(SyncPlotWriter):
+    """Renders and saves the checkpoint images in a background process.
+
+    The training loop only hands over the NumPy arrays; rendering and
+    PNG encoding happen in the worker. The queue is bounded, so if the
+    worker falls behind the loop blocks instead of piling up arrays. If
+    the worker dies (a backend error, out of memory) the images are
+    rendered on the calling thread instead of waiting on a full queue.
+    The worker is spawned (not forked) so it does not inherit the
+    TensorFlow runtime; scripts using it need an if __name__ == "__main__"
+    guard.
+    """
+
+    def __init__(self, renderer="mosaic", max_queued=8, poll_interval=1., close_timeout=600.):
+        SyncPlotWriter.__init__(self, renderer)
+        self.poll_interval = poll_interval
+        self.close_timeout = close_timeout
+        self.sync_time = 0.
+        context = multiprocessing.get_context("spawn")
+        self.queue = context.Queue(max_queued)
+        self.render_time = context.Value('d', 0.)
+        self.process = context.Process(target=plot_worker, args=(self.queue, self.render_time))
+        self.process.daemon = True
+        self.process.start()
+
+    def put(self, task):
+        # Returns False once the worker is dead, instead of blocking on a queue nobody reads
+        while self.process is not None:
+            if not self.process.is_alive():
+                print("Plot worker exited with code " + str(self.process.exitcode) + ", plotting synchronously")
+                self.process = None
+                break
+            try:
+                self.queue.put(task, timeout=self.poll_interval)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def submit(self, kind, args, filename):
+        start = time.time()
+        # copies, so the caller may reuse its arrays
+        if not self.put((kind, tuple(np.array(a) if isinstance(a, np.ndarray) else a for a in args), filename,
+                         self.renderer)):
+            render(kind, args, filename, self.renderer)
+            self.sync_time += time.time() - start
+        self.blocked_time += time.time() - start
+
+    def close(self):
+        # Waits for the queued images; returns the render time and the time the caller was blocked
+        if self.put(None):
+            self.process.join(self.close_timeout)
+            if self.process.is_alive():
+                print("Plot worker still running after " + str(self.close_timeout) + "s, terminating it")
+                self.process.terminate()
+                self.process.join()
+        return self.render_time.value + self.sync_time, self.blocked_time
+
+
+def plot_writer(background=True, renderer="mosaic"):
+    return PlotWriter(renderer) if background else SyncPlotWriter(renderer)
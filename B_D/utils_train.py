@@ -0,0 +1,59 @@
+import contextlib
+import copy
+import tensorflow as tf
+
+
+def variable_reader():
+    # read(var) returns var.read_value(), created where it is first called for var
+    reads = {}
+
+    def read(var):
+        if var.name not in reads:
+            reads[var.name] = var.read_value()
+        return reads[var.name]
+    return read
+
+
+@contextlib.contextmanager
+def reading_variables(read):
+    # tf.get_variable in the block returns read(var) for the trainable variables
+    def getter(getter, *args, **kwargs):
+        var = getter(*args, **kwargs)
+        return read(var) if kwargs.get("trainable") is not False else var
+    with tf.variable_scope(tf.get_variable_scope(), custom_getter=getter, auxiliary_name_scope=False):
+        yield
+
+
+def with_reads(obj, read):
+    """Shallow copy of obj whose tf.Variable attributes (and lists of them) are read(var)."""
+    view = copy.copy(obj)
+    for name, value in vars(obj).items():
+        if isinstance(value, tf.Variable):
+            setattr(view, name, read(value))
+        elif isinstance(value, list) and value and all(isinstance(v, tf.Variable) for v in value):
+            setattr(view, name, [read(v) for v in value])
+    return view
+
+
+def sequential_minimize(steps):
+    """Chains several optimizer updates so that one sess.run applies them in order.
+
+    steps is a list of (optimizer, loss_fn, var_list). Each loss_fn(read)
+    is called inside a control dependency on the previous update and must
+    build its loss from read(var), a var.read_value() made in that block:
+    a ref variable used directly as a tensor is read through the snapshot
+    created with it, which the control dependency does not order after the
+    update. with_reads() and reading_variables() route the weights of a
+    network through read. The forward pass and its gradients then see the
+    updated values, as if the train ops were run in separate sess.run
+    calls. apply_gradients is kept outside the control dependency so the
+    optimizer slot initializers do not pick it up.
+
+    Returns the list of train ops; running the k-th one runs updates 0..k.
+    """
+    train_ops = []
+    for optimizer, loss_fn, var_list in steps:
+        with tf.control_dependencies(train_ops[-1:]):
+            grads_and_vars = optimizer.compute_gradients(loss_fn(variable_reader()), var_list=var_list)
+        train_ops.append(optimizer.apply_gradients(grads_and_vars))
+    return train_ops